@@ -1,13 +1,31 @@
-"""Components package for Venna AI Streamlit app."""
-
-from .chat import (
-    render_chat_input,
-    render_chat_history,
-    render_ai_response,
-    add_to_chat_history,
-    get_chat_history,
-    clear_chat_history,
-    initialize_chat_history,
-)
-from .sidebar import render_sidebar
-from .example_questions import render_example_questions, EXAMPLE_QUESTIONS
+"""Components package for Venna AI Streamlit app.
+
+Re-exports are resolved lazily so that importing a Streamlit-free submodule
+(e.g. ``components._sidebar_constants``) does not pull in Streamlit.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "render_chat_input": ".chat",
+    "render_chat_history": ".chat",
+    "render_ai_response": ".chat",
+    "add_to_chat_history": ".chat",
+    "get_chat_history": ".chat",
+    "clear_chat_history": ".chat",
+    "initialize_chat_history": ".chat",
+    "render_sidebar": ".sidebar",
+    "render_example_questions": ".example_questions",
+    "EXAMPLE_QUESTIONS": ".example_questions",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
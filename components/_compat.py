@@ -0,0 +1,11 @@
+"""Compatibility shims for older Streamlit releases."""
+
+import streamlit as st
+
+# st.fragment (1.37+, experimental_fragment from 1.33) reruns only the
+# decorated function when a widget inside it changes. On older releases the
+# decorator is a no-op and the function renders as part of the full script.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+if fragment is None:
+    def fragment(func):
+        return func
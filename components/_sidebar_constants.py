@@ -0,0 +1,61 @@
+"""Static sidebar data for Venna AI.
+
+Kept free of Streamlit imports so the constants can be used outside the UI.
+"""
+
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+# Column categories for reference
+COLUMN_CATEGORIES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "Identifiers": (
+        "ticker",
+        "company_name",
+        "fiscal_year",
+        "fiscal_quarter",
+        "period_type",
+    ),
+    "Financial Metrics (Millions SAR)": (
+        "revenue_millions",
+        "net_profit_millions",
+        "total_assets_millions",
+        "total_equity_millions",
+    ),
+    "Ratios (%)": (
+        "roe_percent",
+        "net_margin_percent",
+        "current_ratio",
+        "quick_ratio",
+        "debt_to_equity_percent",
+    ),
+    "Categories": (
+        "sector",
+        "company_type",
+        "size_category",
+        "profit_status",
+        "liquidity_status",
+        "leverage_status",
+        "roe_status",
+    ),
+    "Flags": (
+        "is_latest",
+        "is_annual",
+    ),
+})
+
+# Companies with complete 2024 annual data
+COMPANIES_2024 = (
+    "Riyad Bank", "Bank Aljazira", "Saudi Investment Bank",
+    "Saudi Awwal Bank", "Bank Albilad", "Alinma Bank",
+    "Arabian Cement Co", "Yamama Cement Co", "Yanbu Cement Co",
+    "City Cement Co", "Southern Province Cement Co", "Umm Al-Qura Cement Co",
+    "Qassim Cement Co", "Riyadh Cement Co", "Eastern Province Cement Co",
+    "Almarai Co", "Jarir Marketing Co", "Nahdi Medical Co",
+    "BinDawood Holding Co", "Leejam Sports Co", "Aldrees Petroleum and Transport Services Co",
+    "Almunajem Foods Co", "Arabian Pipes Co", "Zamil Industrial Investment Co",
+    "Saudi Industrial Investment Group", "Astra Industrial Group", "Bawan Co",
+    "United Wire Factories Co", "Amlak International Finance Co",
+    "Nayifat Finance Co", "SHL Finance Co", "Emaar The Economic City",
+    "MBC Group Co", "Etihad Atheeb Telecommunication Co", "Canadian Medical Center Co",
+    "Saudi Tadawul Group Holding Co",
+)
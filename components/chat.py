@@ -3,19 +3,72 @@
 Provides chat input, message display, and response handling with export functionality.
 """
 
-import hashlib
+import html
+import importlib.util
 import io
+import logging
+import time
+import uuid
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 import streamlit as st
-import pandas as pd
+
+from ._compat import fragment
+
+# pandas (and openpyxl/xlsxwriter) are imported inside the functions that
+# need them so importing this module stays cheap on app cold start.
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Row count above which Excel exports switch to xlsxwriter's constant_memory mode
+EXCEL_STREAMING_THRESHOLD = 5000
+
+# Maximum rows shown in the results table; exports always include every row
+VIEW_ROWS = 500
+
+# Number of most recent chat history entries rendered on every rerun
+HISTORY_WINDOW = 10
+
+# Static markup shared across renders. Layout styles stay inline: only
+# streamlit_app.py injects styles/css.py, and vanna_app.py brings its own CSS.
+_KBD_HINT_HTML = (
+    '<p style="text-align: right; color: var(--text-muted); font-size: 12px; margin-bottom: 4px;">'
+    '<span class="kbd-hint">Enter</span> to send'
+    '</p>'
+)
+
+_LOADING_HTML = (
+    '<div style="text-align: center; padding: 20px;">'
+    '<div class="loading-dot"></div><div class="loading-dot"></div><div class="loading-dot"></div>'
+    '<p style="color: var(--text-muted); margin-top: 10px;">Analyzing your question...</p>'
+    '</div>'
+)
+
+# Filled with an HTML-escaped error message
+_ERROR_TEMPLATE = (
+    '<div class="error-banner">'
+    '<div class="error-banner-title">:material/error: Query Error</div>'
+    '<div class="error-banner-message">{msg}</div>'
+    '</div>'
+)
+
+# openpyxl serializes through lxml when it is available, which is considerably
+# faster for write-only workbooks than the stdlib XML fallback.
+if importlib.util.find_spec("lxml") is None:
+    logger.warning("lxml not installed; Excel exports will use the slower stdlib XML writer")
 
 
 def _get_response_key(response_data: Dict[str, Any]) -> str:
-    """Generate a stable key from response data.
+    """Get the unique widget key for a response.
 
-    Uses a hash of the content to ensure consistent keys across Streamlit reruns.
+    A random id is assigned the first time a response is seen and stored on
+    it under ``_uid``, so the key is stable across Streamlit reruns and never
+    collides between responses with the same (or empty) SQL.
 
     Args:
         response_data: Response dictionary
@@ -23,8 +76,67 @@ def _get_response_key(response_data: Dict[str, Any]) -> str:
     Returns:
         8-character hex string suitable for widget keys
     """
-    content = str(response_data.get("sql", "")) + str(len(response_data.get("results", [])))
-    return hashlib.md5(content.encode()).hexdigest()[:8]
+    key = response_data.get("_uid")
+    if key is None:
+        key = uuid.uuid4().hex[:8]
+        response_data["_uid"] = key
+    return key
+
+
+def _get_results_df(response_data: Dict[str, Any]) -> "pd.DataFrame":
+    """Get the results DataFrame for a response, building it on first use.
+
+    The DataFrame is stored on the response under ``_df`` so past messages
+    are not re-converted on every Streamlit rerun.
+
+    Args:
+        response_data: Response dictionary
+
+    Returns:
+        DataFrame of the response results
+    """
+    df = response_data.get("_df")
+    if df is None:
+        import pandas as pd
+
+        results = response_data.get("results", [])
+        if results:
+            # SQL rows share one schema, so build columns directly rather
+            # than letting pandas inspect every record dict
+            columns = results[0].keys()
+            df = pd.DataFrame({col: [row.get(col) for row in results] for col in columns})
+        else:
+            df = pd.DataFrame()
+        response_data["_df"] = df
+    return df
+
+
+def _get_view_table(response_data: Dict[str, Any]) -> "Union[pa.Table, pd.DataFrame]":
+    """Get the Arrow table shown in the results view, converting on first use.
+
+    st.dataframe accepts Arrow tables directly, so converting once and storing
+    the table on the response under ``_view_table`` avoids re-serializing the
+    DataFrame on every rerun. Columns Arrow cannot type (e.g. numbers mixed
+    with 'N/A' strings) fall back to the pandas rows, which st.dataframe
+    converts with its own handling.
+
+    Args:
+        response_data: Response dictionary
+
+    Returns:
+        Arrow table (or DataFrame fallback) of the first VIEW_ROWS result rows
+    """
+    table = response_data.get("_view_table")
+    if table is None:
+        import pyarrow as pa
+
+        view = _get_results_df(response_data).head(VIEW_ROWS)
+        try:
+            table = pa.Table.from_pandas(view, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = view
+        response_data["_view_table"] = table
+    return table
 
 
 def initialize_chat_history() -> None:
@@ -46,10 +158,13 @@ def add_to_chat_history(role: str, content: Any, response_data: Optional[Dict[st
     entry = {
         "role": role,
         "content": content,
-        "timestamp": datetime.now().isoformat(),
+        # Epoch seconds; format only when displayed
+        "timestamp": time.time(),
     }
 
     if response_data is not None:
+        # Assign the widget key at insertion time
+        _get_response_key(response_data)
         entry["response_data"] = response_data
 
     st.session_state.chat_history.append(entry)
@@ -79,12 +194,7 @@ def render_chat_input(placeholder: str = "Ask a question about TASI financial da
     Returns:
         User's query or None
     """
-    st.markdown(
-        '<p style="text-align: right; color: var(--text-muted); font-size: 12px; margin-bottom: 4px;">'
-        '<span class="kbd-hint">Enter</span> to send'
-        '</p>',
-        unsafe_allow_html=True
-    )
+    st.markdown(_KBD_HINT_HTML, unsafe_allow_html=True)
 
     return st.chat_input(placeholder)
 
@@ -99,19 +209,24 @@ def render_user_message(query: str) -> None:
         st.write(query)
 
 
-def export_to_csv(df: pd.DataFrame) -> str:
-    """Export DataFrame to CSV string.
+def export_to_csv(df: "pd.DataFrame") -> bytes:
+    """Export DataFrame to UTF-8 encoded CSV bytes.
+
+    Writes straight into a binary buffer so the download button does not
+    have to re-encode an intermediate string.
 
     Args:
         df: DataFrame to export
 
     Returns:
-        CSV string
+        CSV file bytes
     """
-    return df.to_csv(index=False)
+    output = io.BytesIO()
+    df.to_csv(output, index=False, encoding='utf-8')
+    return output.getvalue()
 
 
-def export_to_excel(df: pd.DataFrame) -> bytes:
+def export_to_excel(df: "pd.DataFrame") -> bytes:
     """Export DataFrame to Excel bytes.
 
     Args:
@@ -120,53 +235,146 @@ def export_to_excel(df: pd.DataFrame) -> bytes:
     Returns:
         Excel file bytes
     """
+    if len(df) > EXCEL_STREAMING_THRESHOLD:
+        return _export_to_excel_streaming(df)
+
+    import openpyxl
+
+    # Write-only mode streams rows instead of building the full cell model
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Results')
+    append = ws.append
+    append(list(df.columns))
+    all_numeric = all(dtype.kind in "iuf" for dtype in df.dtypes)
+    if all_numeric and not df.isna().values.any():
+        # One ndarray.tolist() per row instead of per-cell boxing
+        rows = (row.tolist() for row in df.to_numpy())
+    else:
+        # Excel has no NaN; emit empty cells like DataFrame.to_excel does
+        df = df.astype(object).where(df.notna(), None)
+        rows = df.itertuples(index=False, name=None)
+    # Drive the appends from C by exhausting map() into a zero-length deque
+    deque(map(append, rows), maxlen=0)
+
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    wb.save(output)
+    return output.getvalue()
+
+
+def _export_to_excel_streaming(df: "pd.DataFrame") -> bytes:
+    """Export a large DataFrame to Excel bytes with xlsxwriter.
+
+    constant_memory flushes each row as it is written, so no shared-strings
+    table or per-cell objects are kept around for the whole sheet.
+
+    Args:
+        df: DataFrame to export
+
+    Returns:
+        Excel file bytes
+    """
+    import pandas as pd
+
+    output = io.BytesIO()
+    engine_kwargs = {
+        'options': {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+        }
+    }
+    with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs=engine_kwargs) as writer:
         df.to_excel(writer, index=False, sheet_name='Results')
     return output.getvalue()
 
 
-def generate_export_filename(prefix: str, extension: str) -> str:
+@st.cache_data(max_entries=64, show_spinner=False)
+def _csv_bytes(response_key: str, _df: "pd.DataFrame") -> bytes:
+    """Cached CSV export, computed once per unique response.
+
+    The DataFrame is excluded from Streamlit's argument hashing (leading
+    underscore); ``response_key`` is unique per response and its results
+    never change, so it identifies the content on its own.
+    """
+    return export_to_csv(_df)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _excel_bytes(response_key: str, _df: "pd.DataFrame") -> bytes:
+    """Cached Excel export, computed once per unique response.
+
+    The DataFrame is excluded from Streamlit's argument hashing (leading
+    underscore); ``response_key`` is unique per response and its results
+    never change, so it identifies the content on its own.
+    """
+    return export_to_excel(_df)
+
+
+def generate_export_filename(prefix: str, extension: str, timestamp: Optional[str] = None) -> str:
     """Generate a filename for exports.
 
     Args:
         prefix: Filename prefix
         extension: File extension
+        timestamp: Timestamp string to embed; defaults to the current time
 
     Returns:
         Generated filename
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"{prefix}_{timestamp}.{extension}"
 
 
-def render_export_buttons(df: pd.DataFrame, response_key: str) -> None:
+def _get_export_timestamp(response_key: str) -> str:
+    """Get the export timestamp for a response, fixed on first render.
+
+    Freezing it per response keeps the download filename stable across
+    reruns instead of changing every second.
+
+    Args:
+        response_key: Unique key for the response
+
+    Returns:
+        Timestamp string for export filenames
+    """
+    if "export_timestamps" not in st.session_state:
+        st.session_state.export_timestamps = {}
+
+    timestamps = st.session_state.export_timestamps
+    if response_key not in timestamps:
+        timestamps[response_key] = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return timestamps[response_key]
+
+
+def render_export_buttons(df: "pd.DataFrame", response_key: str) -> None:
     """Render export buttons for a DataFrame.
 
     Args:
         df: DataFrame to export
         response_key: Unique key for the response
     """
-    col1, col2, col3 = st.columns([2, 1, 1])
+    export_ts = _get_export_timestamp(response_key)
+    # One right-aligned column holds both buttons; fewer column deltas per response
+    _, col_export = st.columns([3, 1])
 
-    with col2:
-        csv_data = export_to_csv(df)
+    with col_export:
+        csv_data = _csv_bytes(response_key, df)
         st.download_button(
             label=":material/download: CSV",
             data=csv_data,
-            file_name=generate_export_filename("tasi_data", "csv"),
+            file_name=generate_export_filename("tasi_data", "csv", export_ts),
             mime="text/csv",
             key=f"export_csv_{response_key}",
             help="Download as CSV"
         )
 
-    with col3:
         try:
-            excel_data = export_to_excel(df)
+            excel_data = _excel_bytes(response_key, df)
             st.download_button(
                 label=":material/table_chart: Excel",
                 data=excel_data,
-                file_name=generate_export_filename("tasi_data", "xlsx"),
+                file_name=generate_export_filename("tasi_data", "xlsx", export_ts),
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 key=f"export_xlsx_{response_key}",
                 help="Download as Excel"
@@ -187,12 +395,7 @@ def render_ai_response(response_data: Dict[str, Any], show_sql: bool = True) ->
         # Error response
         error_msg = response_data.get("error", "An unknown error occurred")
         st.markdown(
-            f'''
-            <div class="error-banner">
-                <div class="error-banner-title">:material/error: Query Error</div>
-                <div class="error-banner-message">{error_msg}</div>
-            </div>
-            ''',
+            _ERROR_TEMPLATE.format(msg=html.escape(str(error_msg))),
             unsafe_allow_html=True
         )
 
@@ -221,18 +424,23 @@ def render_ai_response(response_data: Dict[str, Any], show_sql: bool = True) ->
 
     with tab_result:
         if results:
-            # Convert to DataFrame
-            df = pd.DataFrame(results)
+            # Convert to DataFrame (memoized on the response)
+            df = _get_results_df(response_data)
 
             # Export buttons
             render_export_buttons(df, response_key)
 
-            # Display dataframe
+            # Display dataframe (capped; exports carry the full result)
             st.dataframe(
-                df,
+                _get_view_table(response_data),
                 use_container_width=True,
                 hide_index=True,
             )
+            if len(df) > VIEW_ROWS:
+                st.caption(
+                    f"Showing first {VIEW_ROWS:,} of {len(df):,} rows. "
+                    "Use CSV/Excel export for the full dataset."
+                )
         else:
             st.info("No results found for this query.")
 
@@ -244,27 +452,53 @@ def render_ai_response(response_data: Dict[str, Any], show_sql: bool = True) ->
                 st.info("No SQL was generated for this response.")
 
 
-def render_chat_history(show_sql: bool = True) -> None:
-    """Render the full chat history.
+@fragment
+def _render_history_entry(entry: Dict[str, Any], show_sql: bool) -> None:
+    """Render a single chat history entry.
+
+    Runs as a Streamlit fragment where supported, so interacting with the
+    entry's own widgets (tabs, downloads) does not re-render the rest of
+    the history.
+
+    Args:
+        entry: Chat history entry
+        show_sql: Whether to show SQL in responses
+    """
+    role = entry["role"]
+    content = entry["content"]
+
+    if role == "user":
+        with st.chat_message("human"):
+            st.write(content)
+    else:
+        with st.chat_message("ai"):
+            if "response_data" in entry:
+                render_ai_response(entry["response_data"], show_sql=show_sql)
+            else:
+                st.write(content)
+
+
+def render_chat_history(show_sql: bool = True, window: int = HISTORY_WINDOW) -> None:
+    """Render the chat history.
+
+    Only the most recent ``window`` entries are rendered on every rerun;
+    older entries are rendered on demand behind a toggle.
 
     Args:
         show_sql: Whether to show SQL in responses
+        window: Number of most recent entries to always render
     """
     history = get_chat_history()
+    earlier, recent = history[:-window], history[-window:]
 
-    for entry in history:
-        role = entry["role"]
-        content = entry["content"]
+    # A toggle rather than an expander: responses may contain expanders
+    # themselves, and Streamlit does not allow nesting them.
+    if earlier and st.toggle(f"Show earlier messages ({len(earlier)})", key="show_earlier"):
+        for entry in earlier:
+            _render_history_entry(entry, show_sql)
 
-        if role == "user":
-            with st.chat_message("human"):
-                st.write(content)
-        else:
-            with st.chat_message("ai"):
-                if "response_data" in entry:
-                    render_ai_response(entry["response_data"], show_sql=show_sql)
-                else:
-                    st.write(content)
+    for entry in recent:
+        _render_history_entry(entry, show_sql)
 
 
 def render_clear_history_button() -> bool:
@@ -298,14 +532,4 @@ def render_clear_history_button() -> bool:
 
 def render_loading_animation() -> None:
     """Render a loading animation."""
-    st.markdown(
-        '''
-        <div style="text-align: center; padding: 20px;">
-            <div class="loading-dot"></div>
-            <div class="loading-dot"></div>
-            <div class="loading-dot"></div>
-            <p style="color: var(--text-muted); margin-top: 10px;">Analyzing your question...</p>
-        </div>
-        ''',
-        unsafe_allow_html=True
-    )
+    st.markdown(_LOADING_HTML, unsafe_allow_html=True)
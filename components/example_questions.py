@@ -4,11 +4,20 @@ Provides clickable example queries to help users get started.
 """
 
 import streamlit as st
-from typing import Optional
+from itertools import chain
+from typing import NamedTuple, Optional
+
+
+class Example(NamedTuple):
+    """A clickable example question."""
+
+    label: str
+    query: str
+    icon: str
 
 
 # Example questions organized by category
-EXAMPLE_QUESTIONS = {
+_RAW_EXAMPLE_QUESTIONS = {
     "2024 Data": [
         {
             "label": "Bank performance in 2024",
@@ -89,28 +98,37 @@ EXAMPLE_QUESTIONS = {
     ]
 }
 
+EXAMPLE_QUESTIONS = {
+    category: tuple(Example(**item) for item in items)
+    for category, items in _RAW_EXAMPLE_QUESTIONS.items()
+}
+
+# Number of 2024 examples featured as prominent buttons by default
+DEFAULT_FEATURED = 3
+
+# Derived views of EXAMPLE_QUESTIONS, computed once at import
+_ALL_EXAMPLES = tuple(chain.from_iterable(EXAMPLE_QUESTIONS.values()))
+_FEATURED_2024 = EXAMPLE_QUESTIONS["2024 Data"][:DEFAULT_FEATURED]
+
 
-def get_examples_by_category(category: str) -> list:
+def get_examples_by_category(category: str) -> tuple:
     """Get examples for a specific category.
 
     Args:
         category: Category name (Popular, Analysis, Exploration)
 
     Returns:
-        List of example dictionaries
+        Tuple of Example entries
     """
-    return EXAMPLE_QUESTIONS.get(category, [])
+    return EXAMPLE_QUESTIONS.get(category, ())
 
 
-def get_all_examples() -> list:
-    """Get all examples flattened into a single list."""
-    all_examples = []
-    for questions in EXAMPLE_QUESTIONS.values():
-        all_examples.extend(questions)
-    return all_examples
+def get_all_examples() -> tuple:
+    """Get all examples flattened into a single tuple."""
+    return _ALL_EXAMPLES
 
 
-def render_example_questions(max_visible: int = 3) -> Optional[str]:
+def render_example_questions(max_visible: int = DEFAULT_FEATURED) -> Optional[str]:
     """Render example question buttons.
 
     Args:
@@ -125,7 +143,10 @@ def render_example_questions(max_visible: int = 3) -> Optional[str]:
     st.subheader("Try an Example")
 
     # Display first few 2024 examples as prominent buttons (NEW!)
-    featured_2024 = EXAMPLE_QUESTIONS["2024 Data"][:max_visible]
+    if max_visible == DEFAULT_FEATURED:
+        featured_2024 = _FEATURED_2024
+    else:
+        featured_2024 = EXAMPLE_QUESTIONS["2024 Data"][:max_visible]
 
     cols = st.columns(len(featured_2024))
     for i, example in enumerate(featured_2024):
@@ -136,13 +157,13 @@ def render_example_questions(max_visible: int = 3) -> Optional[str]:
             btn_type = "primary" if is_active else "secondary"
 
             if st.button(
-                f":{example['icon']}: {example['label']}",
+                f":{example.icon}: {example.label}",
                 key=btn_key,
                 use_container_width=True,
-                help=example["query"],
+                help=example.query,
                 type=btn_type
             ):
-                selected_query = example["query"]
+                selected_query = example.query
                 st.session_state.active_example = btn_key
 
     # More examples in expander
@@ -162,14 +183,14 @@ def render_example_questions(max_visible: int = 3) -> Optional[str]:
             for j, example in enumerate(questions_to_show):
                 col1, col2 = st.columns([4, 1])
                 with col1:
-                    st.markdown(f":{example['icon']}: {example['label']}")
+                    st.markdown(f":{example.icon}: {example.label}")
                 with col2:
                     if st.button(
                         "Try",
                         key=f"example_{category}_{j}",
-                        help=example["query"]
+                        help=example.query
                     ):
-                        selected_query = example["query"]
+                        selected_query = example.query
 
             st.markdown("")  # Spacing
 
@@ -189,7 +210,7 @@ def render_example_questions_minimal() -> Optional[str]:
     cols = st.columns(len(popular))
     for i, example in enumerate(popular):
         with cols[i]:
-            if st.button(example["label"], key=f"quick_{i}", use_container_width=True):
-                return example["query"]
+            if st.button(example.label, key=f"quick_{i}", use_container_width=True):
+                return example.query
 
     return None
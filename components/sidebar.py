@@ -3,150 +3,170 @@
 Provides database info, settings, column reference, and filters.
 """
 
+import html
+
 import streamlit as st
-from typing import Dict, Any, Optional
-
-
-# Column categories for reference
-COLUMN_CATEGORIES = {
-    "Identifiers": [
-        "ticker",
-        "company_name",
-        "fiscal_year",
-        "fiscal_quarter",
-        "period_type",
-    ],
-    "Financial Metrics (Millions SAR)": [
-        "revenue_millions",
-        "net_profit_millions",
-        "total_assets_millions",
-        "total_equity_millions",
-    ],
-    "Ratios (%)": [
-        "roe_percent",
-        "net_margin_percent",
-        "current_ratio",
-        "quick_ratio",
-        "debt_to_equity_percent",
-    ],
-    "Categories": [
-        "sector",
-        "company_type",
-        "size_category",
-        "profit_status",
-        "liquidity_status",
-        "leverage_status",
-        "roe_status",
-    ],
-    "Flags": [
-        "is_latest",
-        "is_annual",
-    ],
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from typing import Dict, Any, Final, List, Optional, Tuple
+
+from ._sidebar_constants import COLUMN_CATEGORIES, COMPANIES_2024
+
+
+# Static sidebar markup, built once at import
+_BRAND_TITLE_HTML: Final[str] = '<h2 style="text-align: center; color: #00A651;">Venna AI</h2>'
+
+_BRAND_TAGLINE_HTML: Final[str] = (
+    '<p style="text-align: center; color: #D4A84B; font-size: 14px;">TASI Financial Analytics</p>'
+)
+
+_DATA_BADGE_HTML: Final[str] = (
+    '<div style="background: linear-gradient(135deg, #00A651 0%, #D4A84B 100%); '
+    'padding: 12px; border-radius: 8px; text-align: center; margin-bottom: 12px;">'
+    '<div style="color: white; font-size: 14px; font-weight: 600;">Latest Extraction</div>'
+    '<div style="color: white; font-size: 20px; font-weight: 700;">Feb 3, 2026</div>'
+    '</div>'
+)
+
+_SECTORS_HTML: Final[str] = """
+<div style="font-size: 13px; line-height: 1.8;">
+    <div>🏦 Banks: <strong>6</strong></div>
+    <div>🏭 Industrial: <strong>15</strong></div>
+    <div>🛒 Consumer & Retail: <strong>7</strong></div>
+    <div>💰 Finance: <strong>3</strong></div>
+    <div>🏢 Real Estate: <strong>1</strong></div>
+    <div>📺 Media: <strong>1</strong></div>
+    <div>📡 Telecom: <strong>1</strong></div>
+    <div>💼 Financial Services: <strong>1</strong></div>
+    <div>🏥 Healthcare: <strong>1</strong></div>
+</div>
+"""
+
+_COVERAGE_HTML: Final[str] = """
+<div style="font-size: 12px; line-height: 1.6;">
+    <div>✓ Financial Statements: <strong>Complete</strong></div>
+    <div>✓ Key Metrics: <strong>All Captured</strong></div>
+    <div>✓ Sector Classification: <strong>Verified</strong></div>
+    <div>✓ Data Extraction Date: <strong>Feb 3, 2026</strong></div>
+</div>
+"""
+
+# Column reference as a single markdown message (one fenced block per category)
+_COLUMN_REFERENCE_MD: Final[str] = "\n\n".join(
+    f"**{category}:**\n```\n" + "\n".join(columns) + "\n```"
+    for category, columns in COLUMN_CATEGORIES.items()
+)
+
+# session_state keys backing the settings and filter widgets
+_SETTINGS_KEYS: Final[Dict[str, str]] = {
+    "max_results": "setting_max_results",
+    "show_sql": "setting_show_sql",
+    "format_numbers": "setting_format_numbers",
 }
+_FILTER_KEYS: Final[Dict[str, str]] = {
+    "year": "filter_year",
+    "period_type": "filter_period_type",
+    "sector": "filter_sector",
+}
+
+# Filter options
+_CURRENT_YEAR: Final[int] = 2024
+_YEAR_OPTIONS: Final[tuple] = ("All", *range(_CURRENT_YEAR, 2018, -1))
+_PERIOD_OPTIONS: Final[tuple] = ("All", "Annual", "Quarterly")
+_SECTOR_OPTIONS: Final[tuple] = (
+    "All",
+    "Financials",
+    "Insurance",
+    "Real Estate",
+    "Materials",
+    "Consumer Staples",
+    "Healthcare",
+    "Energy",
+    "Utilities",
+)
+
+# Static scrollable list instead of a disabled text_area widget
+_COMPANIES_2024_HTML: Final[str] = (
+    '<div style="height: 150px; overflow-y: auto; font-size: 13px; line-height: 1.6;">'
+    + "".join(f"<div>• {html.escape(company)}</div>" for company in sorted(COMPANIES_2024))
+    + '</div>'
+)
+
+
+def _fmt_int(value: Any) -> str:
+    """Format a stat for display: thousands separators for ints, "N/A" if missing."""
+    if isinstance(value, int):
+        return f"{value:,}"
+    return "N/A" if value is None else value
+
+
+def _metric_grid(metrics: List[Tuple[str, str, str]]) -> str:
+    """Build a static HTML grid of metric tiles.
+
+    Args:
+        metrics: (label, value, help) triples; help becomes the tile tooltip
+
+    Returns:
+        HTML string for st.markdown(..., unsafe_allow_html=True)
+    """
+    tiles = "".join(
+        f'<div title="{html.escape(help_text)}" style="flex: 1; min-width: 0;">'
+        f'<div style="font-size: 13px; opacity: 0.8;">{html.escape(label)}</div>'
+        f'<div style="font-size: 24px; font-weight: 600;">{html.escape(str(value))}</div>'
+        '</div>'
+        for label, value, help_text in metrics
+    )
+    return f'<div style="display: flex; gap: 12px; margin-bottom: 12px;">{tiles}</div>'
+
+
+_COMPANY_COUNT_HTML: Final[str] = _metric_grid([
+    ("Companies with 2024 Data", "36", "Companies with complete 2024 annual financial data"),
+])
+
+_QUALITY_METRICS_HTML: Final[str] = _metric_grid([
+    ("Completeness", "100%", "All 36 companies have complete financial records"),
+    ("Validation Status", "Valid", "All records passed validation checks"),
+])
+
+
+def _render_brand() -> None:
+    """Render the sidebar logo and tagline."""
+    st.markdown(_BRAND_TITLE_HTML, unsafe_allow_html=True)
+    st.markdown(_BRAND_TAGLINE_HTML, unsafe_allow_html=True)
 
 
 def render_2024_data_status() -> None:
     """Render 2024 data freshness indicator with detailed company status."""
     with st.expander("📊 2024 Data Status", expanded=True):
         # Data freshness badge
-        st.markdown(
-            '<div style="background: linear-gradient(135deg, #00A651 0%, #D4A84B 100%); '
-            'padding: 12px; border-radius: 8px; text-align: center; margin-bottom: 12px;">'
-            '<div style="color: white; font-size: 14px; font-weight: 600;">Latest Extraction</div>'
-            '<div style="color: white; font-size: 20px; font-weight: 700;">Feb 3, 2026</div>'
-            '</div>',
-            unsafe_allow_html=True
-        )
+        st.markdown(_DATA_BADGE_HTML, unsafe_allow_html=True)
 
         # Company count
-        st.metric(
-            label="Companies with 2024 Data",
-            value="36",
-            help="Companies with complete 2024 annual financial data"
-        )
+        st.markdown(_COMPANY_COUNT_HTML, unsafe_allow_html=True)
 
         # Sector breakdown
         st.markdown("**Sector Breakdown:**")
-        sectors_html = """
-        <div style="font-size: 13px; line-height: 1.8;">
-            <div>🏦 Banks: <strong>6</strong></div>
-            <div>🏭 Industrial: <strong>15</strong></div>
-            <div>🛒 Consumer & Retail: <strong>7</strong></div>
-            <div>💰 Finance: <strong>3</strong></div>
-            <div>🏢 Real Estate: <strong>1</strong></div>
-            <div>📺 Media: <strong>1</strong></div>
-            <div>📡 Telecom: <strong>1</strong></div>
-            <div>💼 Financial Services: <strong>1</strong></div>
-            <div>🏥 Healthcare: <strong>1</strong></div>
-        </div>
-        """
-        st.markdown(sectors_html, unsafe_allow_html=True)
+        st.markdown(_SECTORS_HTML, unsafe_allow_html=True)
 
 
 def render_data_quality_section() -> None:
     """Render detailed data quality and company status section."""
     with st.expander("📋 Data Quality & Coverage", expanded=False):
-        # Companies with complete 2024 data
-        companies_2024 = [
-            "Riyad Bank", "Bank Aljazira", "Saudi Investment Bank",
-            "Saudi Awwal Bank", "Bank Albilad", "Alinma Bank",
-            "Arabian Cement Co", "Yamama Cement Co", "Yanbu Cement Co",
-            "City Cement Co", "Southern Province Cement Co", "Umm Al-Qura Cement Co",
-            "Qassim Cement Co", "Riyadh Cement Co", "Eastern Province Cement Co",
-            "Almarai Co", "Jarir Marketing Co", "Nahdi Medical Co",
-            "BinDawood Holding Co", "Leejam Sports Co", "Aldrees Petroleum and Transport Services Co",
-            "Almunajem Foods Co", "Arabian Pipes Co", "Zamil Industrial Investment Co",
-            "Saudi Industrial Investment Group", "Astra Industrial Group", "Bawan Co",
-            "United Wire Factories Co", "Amlak International Finance Co",
-            "Nayifat Finance Co", "SHL Finance Co", "Emaar The Economic City",
-            "MBC Group Co", "Etihad Atheeb Telecommunication Co", "Canadian Medical Center Co",
-            "Saudi Tadawul Group Holding Co"
-        ]
-
         st.markdown("**✅ Companies with Complete 2024 Data (36):**")
         st.caption("All major sectors represented with latest annual reports")
 
         # Show companies in a clean list format
-        with st.container():
-            companies_text = "\n".join([f"• {company}" for company in sorted(companies_2024)])
-            st.text_area(
-                "Company List",
-                companies_text,
-                height=150,
-                label_visibility="collapsed",
-                disabled=True
-            )
+        st.markdown(_COMPANIES_2024_HTML, unsafe_allow_html=True)
 
         st.divider()
 
         # Data quality indicators
         st.markdown("**📊 Data Quality Indicators:**")
 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric(
-                label="Completeness",
-                value="100%",
-                help="All 36 companies have complete financial records"
-            )
-        with col2:
-            st.metric(
-                label="Validation Status",
-                value="Valid",
-                help="All records passed validation checks"
-            )
+        st.markdown(_QUALITY_METRICS_HTML, unsafe_allow_html=True)
 
         # Coverage stats
         st.markdown("**📈 Coverage Statistics:**")
-        coverage_html = """
-        <div style="font-size: 12px; line-height: 1.6;">
-            <div>✓ Financial Statements: <strong>Complete</strong></div>
-            <div>✓ Key Metrics: <strong>All Captured</strong></div>
-            <div>✓ Sector Classification: <strong>Verified</strong></div>
-            <div>✓ Data Extraction Date: <strong>Feb 3, 2026</strong></div>
-        </div>
-        """
-        st.markdown(coverage_html, unsafe_allow_html=True)
+        st.markdown(_COVERAGE_HTML, unsafe_allow_html=True)
 
         st.info("💡 To update data, run: `python scripts/insert_extracted_data.py`", icon="ℹ️")
 
@@ -155,19 +175,15 @@ def render_database_info(db_stats: Optional[Dict[str, Any]] = None) -> None:
     """Render the database information section in collapsible expander."""
     with st.expander("Database Overview", expanded=False):
         if db_stats:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric(
-                    label="Total Companies",
-                    value=f"{db_stats.get('companies', 'N/A'):,}" if isinstance(db_stats.get('companies'), int) else db_stats.get('companies', 'N/A'),
-                    help="All unique companies in the database"
-                )
-            with col2:
-                st.metric(
-                    label="Total Records",
-                    value=f"{db_stats.get('records', 'N/A'):,}" if isinstance(db_stats.get('records'), int) else db_stats.get('records', 'N/A'),
-                    help="All financial records across all years"
-                )
+            st.markdown(
+                _metric_grid([
+                    ("Total Companies", _fmt_int(db_stats.get('companies')),
+                     "All unique companies in the database"),
+                    ("Total Records", _fmt_int(db_stats.get('records')),
+                     "All financial records across all years"),
+                ]),
+                unsafe_allow_html=True
+            )
 
             if db_stats.get('sectors'):
                 st.caption(f"Sectors: {db_stats['sectors']}")
@@ -180,88 +196,82 @@ def render_database_info(db_stats: Optional[Dict[str, Any]] = None) -> None:
 def render_column_reference() -> None:
     """Render available columns grouped by category."""
     with st.expander("Column Reference", expanded=False):
-        for category, columns in COLUMN_CATEGORIES.items():
-            st.markdown(f"**{category}:**")
-            st.code("\n".join(columns), language=None)
+        st.markdown(_COLUMN_REFERENCE_MD)
 
 
 def render_settings() -> Dict[str, Any]:
-    """Render settings section and return current settings."""
-    settings = {}
+    """Render settings section and return current settings.
 
+    Widgets are bound to session_state keys, so the returned values are read
+    straight from session_state rather than copied from widget returns.
+    """
     with st.expander("Settings", expanded=False):
         # Max results setting
-        settings["max_results"] = st.slider(
+        st.slider(
             "Max Results",
             min_value=10,
             max_value=100,
             value=20,
             step=10,
-            help="Maximum number of rows to return"
+            help="Maximum number of rows to return",
+            key=_SETTINGS_KEYS["max_results"]
         )
 
         # Show SQL toggle
-        settings["show_sql"] = st.checkbox(
+        st.checkbox(
             "Show Generated SQL",
             value=True,
-            help="Display the generated SQL query"
+            help="Display the generated SQL query",
+            key=_SETTINGS_KEYS["show_sql"]
         )
 
         # Auto-format numbers
-        settings["format_numbers"] = st.checkbox(
+        st.checkbox(
             "Format Numbers",
             value=True,
-            help="Format large numbers with commas"
+            help="Format large numbers with commas",
+            key=_SETTINGS_KEYS["format_numbers"]
         )
 
-    return settings
+    return {name: st.session_state[key] for name, key in _SETTINGS_KEYS.items()}
 
 
 def render_filters() -> Dict[str, Any]:
-    """Render filter section and return current filters."""
-    filters = {}
+    """Render filter section and return current filters.
 
+    Like render_settings, values are read from the widgets' session_state keys.
+    """
     with st.expander("Filters (Optional)", expanded=False):
         st.caption("Apply these filters to your queries")
 
         # Year filter
-        current_year = 2024
-        years = list(range(current_year, 2018, -1))
-        filters["year"] = st.selectbox(
+        st.selectbox(
             "Fiscal Year",
-            options=["All"] + years,
+            options=_YEAR_OPTIONS,
             index=0,
-            help="Filter by fiscal year"
+            help="Filter by fiscal year",
+            key=_FILTER_KEYS["year"]
         )
 
         # Period type filter
-        filters["period_type"] = st.selectbox(
+        st.selectbox(
             "Period Type",
-            options=["All", "Annual", "Quarterly"],
+            options=_PERIOD_OPTIONS,
             index=0,
-            help="Filter by annual or quarterly data"
+            help="Filter by annual or quarterly data",
+            key=_FILTER_KEYS["period_type"]
         )
 
         # Sector filter (common sectors)
-        common_sectors = [
-            "All",
-            "Financials",
-            "Insurance",
-            "Real Estate",
-            "Materials",
-            "Consumer Staples",
-            "Healthcare",
-            "Energy",
-            "Utilities",
-        ]
-        filters["sector"] = st.selectbox(
+        st.selectbox(
             "Sector",
-            options=common_sectors,
+            options=_SECTOR_OPTIONS,
             index=0,
-            help="Filter by industry sector"
+            help="Filter by industry sector",
+            key=_FILTER_KEYS["sector"]
         )
 
-    return filters
+    return {name: st.session_state[key] for name, key in _FILTER_KEYS.items()}
 
 
 def render_quick_actions() -> Optional[str]:
@@ -290,6 +300,14 @@ def render_connection_status(is_connected: bool = False, error: str = None) -> N
             st.caption(f"Error: {error}")
 
 
+def _sidebar_rendered_this_run() -> bool:
+    """Check whether the sidebar's keyed widgets were already created this run."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return False
+    return _FILTER_KEYS["sector"] in getattr(ctx, "widget_user_keys_this_run", ())
+
+
 def render_sidebar(
     db_stats: Optional[Dict[str, Any]] = None,
     is_connected: bool = False,
@@ -305,6 +323,11 @@ def render_sidebar(
     Returns:
         Dictionary containing all sidebar state (settings, filters, actions)
     """
+    # A second call in the same script run would rebuild every section and
+    # trip Streamlit's duplicate widget key check; reuse the first result.
+    if _sidebar_rendered_this_run() and "_sidebar_state" in st.session_state:
+        return st.session_state["_sidebar_state"]
+
     sidebar_state = {
         "settings": {},
         "filters": {},
@@ -313,14 +336,7 @@ def render_sidebar(
 
     with st.sidebar:
         # Logo/Brand
-        st.markdown(
-            '<h2 style="text-align: center; color: #00A651;">Venna AI</h2>',
-            unsafe_allow_html=True
-        )
-        st.markdown(
-            '<p style="text-align: center; color: #D4A84B; font-size: 14px;">TASI Financial Analytics</p>',
-            unsafe_allow_html=True
-        )
+        _render_brand()
 
         st.divider()
 
@@ -355,4 +371,5 @@ def render_sidebar(
         st.caption("Powered by Gemini Flash 2.5")
         st.caption("PostgreSQL + OpenRouter")
 
+    st.session_state["_sidebar_state"] = sidebar_state
     return sidebar_state
@@ -0,0 +1,105 @@
+"""
+Helpers shared by the CSV migration scripts
+(migrate_data.py, setup_database.py, schema/02_etl_migrate.py)
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+import pandas as pd
+import psycopg2
+
+# Date formats found in the CSV, tried in order
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y")
+
+TRUE_STRINGS = frozenset({"TRUE", "YES", "1", "T"})
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(text: str) -> Optional[datetime]:
+    """Parse one date string; cached because period_end values repeat heavily."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(date_str) -> Optional[datetime]:
+    """Parse various date formats from the CSV."""
+    if pd.isna(date_str) or not date_str:
+        return None
+    return _parse_date_text(str(date_str))
+
+
+def clean_numeric(value) -> Optional[float]:
+    """Clean and convert numeric values."""
+    if pd.isna(value) or value == "" or value is None:
+        return None
+
+    if isinstance(value, str):
+        # Remove percentage signs and commas
+        value = value.replace("%", "").replace(",", "").strip()
+        if not value:
+            return None
+
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def clean_boolean(value) -> bool:
+    """Convert various boolean representations."""
+    if pd.isna(value):
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.upper() in TRUE_STRINGS
+    return bool(value)
+
+
+# Tables whose planner statistics go stale after a bulk load
+LOADED_TABLES = ("financial_statements", "financial_metrics", "sectors", "companies", "fiscal_periods")
+
+
+# Materialized views in refresh order, each with the unique index that
+# REFRESH ... CONCURRENTLY requires
+MATERIALIZED_VIEWS = (
+    ("company_financials", "idx_cf_ticker_period", "ticker, fiscal_year, fiscal_quarter"),
+    ("sector_yearly_rollup", "idx_syr_sector_year", "sector, fiscal_year"),
+)
+
+
+def refresh_company_financials(conn) -> None:
+    """Refresh company_financials and the rollups built on it, without blocking readers when possible.
+
+    REFRESH ... CONCURRENTLY needs a unique index and an already populated
+    view; on the first load it fails and a plain REFRESH is used instead.
+    """
+    cursor = conn.cursor()
+    for view, index, columns in MATERIALIZED_VIEWS:
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {view}({columns})")
+        conn.commit()
+        try:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+        except psycopg2.Error:
+            conn.rollback()
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {view}")
+        conn.commit()
+    cursor.close()
+
+
+def vacuum_analyze(conn, tables=LOADED_TABLES) -> None:
+    """Run VACUUM (ANALYZE) on the given tables; VACUUM cannot run inside a transaction."""
+    conn.commit()
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"VACUUM (ANALYZE) {', '.join(tables)}")
+    finally:
+        conn.autocommit = autocommit
@@ -6,11 +6,18 @@ Migrates CSV data to already-created PostgreSQL schema
 import os
 import sys
 import io
+import queue
+import struct
+import threading
+from functools import partial
 from pathlib import Path
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2.extras import execute_values
+import numpy as np
 import pandas as pd
-from datetime import datetime
+
+from etl_helpers import DATE_FORMATS, TRUE_STRINGS, refresh_company_financials, vacuum_analyze
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -23,69 +30,482 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 CSV_PATH = Path(__file__).parent / "TASI_financials_DB.csv"
 
+# Rows buffered in memory before each COPY flush
+FLUSH_ROWS = 10_000
+
+# Value columns loaded into financial_statements (after company_id, period_id)
+STATEMENT_COLUMNS = (
+    "revenue", "cost_of_sales", "gross_profit", "operating_profit", "net_profit", "interest_expense",
+    "total_assets", "total_equity", "total_liabilities", "current_assets", "current_liabilities",
+    "inventory", "receivables", "operating_cash_flow", "capex", "free_cash_flow", "working_capital",
+    "data_quality_score", "is_latest",
+)
+# Column types of staging_statements, which is loaded with binary COPY.
+# Amounts travel as exact decimal text (a float8 would keep only ~15
+# significant digits through the cast) and become NUMERIC(20,2) on the final INSERT.
+STAGING_STATEMENT_TYPES = {
+    "company_id": "int4",
+    "period_id": "int4",
+    **{col: "text" for col in STATEMENT_COLUMNS},
+    "data_quality_score": "int2",
+    "is_latest": "bool",
+}
+
+# Value columns loaded into financial_metrics (after statement_id)
+METRIC_COLUMNS = (
+    "return_on_equity", "return_on_assets", "gross_margin", "operating_margin", "net_margin",
+    "current_ratio", "quick_ratio", "debt_to_equity", "debt_to_assets", "interest_coverage_ratio",
+    "asset_turnover", "inventory_turnover", "days_sales_outstanding", "profitability_score",
+    "profit_status", "liquidity_status", "leverage_status", "roe_status",
+    "has_cogs", "has_operating_profit", "has_cash_flow",
+)
+
+
+# Valid status values (anything else is loaded as NULL)
+PROFIT_STATUS = frozenset({'Profit', 'Loss', 'N/A'})
+LIQUIDITY_STATUS = frozenset({'Strong', 'Moderate', 'Weak', 'Critical'})
+LEVERAGE_STATUS = frozenset({'Low', 'Moderate', 'High', 'Critical'})
+ROE_STATUS = frozenset({'Excellent', 'Good', 'Average', 'Weak', 'Negative', 'N/A'})
+
+# size_category values allowed by the companies CHECK constraint (others load as NULL)
+SIZE_CATEGORIES = frozenset({'Micro Cap', 'Small Cap', 'Mid Cap', 'Large Cap', 'Mega Cap'})
+
+STATUS_COLUMNS = {
+    "profit_status": PROFIT_STATUS,
+    "liquidity_status": LIQUIDITY_STATUS,
+    "leverage_status": LEVERAGE_STATUS,
+    "roe_status": ROE_STATUS,
+}
+
+BOOLEAN_COLUMNS = ("is_latest", "has_cogs", "has_operating_profit", "has_cash_flow")
+
+# Ratio columns with a *_decimal fallback when missing or zero
+RATIO_FALLBACKS = {
+    "return_on_equity": "roe_decimal",
+    "return_on_assets": "roa_decimal",
+    "gross_margin": "gross_margin_decimal",
+    "operating_margin": "operating_margin_decimal",
+    "net_margin": "net_margin_decimal",
+}
+
+NUMERIC_COLUMNS = (
+    "revenue", "cost_of_sales", "gross_profit", "operating_profit", "net_profit", "interest_expense",
+    "total_assets", "total_equity", "total_liabilities", "current_assets", "current_liabilities",
+    "inventory", "receivables", "operating_cash_flow", "capex", "free_cash_flow", "working_capital",
+    "current_ratio", "quick_ratio", "debt_to_equity", "debt_to_assets", "interest_coverage_ratio",
+    "asset_turnover", "inventory_turnover", "days_sales_outstanding",
+    "data_quality_score", "profitability_score",
+    *RATIO_FALLBACKS, *RATIO_FALLBACKS.values(),
+)
+
+# CSV columns the migration reads, with their dtypes; all other columns are skipped
+TEXT_COLUMNS = (
+    "ticker", "period_end", "period_type", "company_name", "company_type", "size_category",
+    "sector_derived", "sector_gics",
+)
+CSV_DTYPES = {
+    **{col: "float64" for col in ("fiscal_year", *NUMERIC_COLUMNS)},
+    **{col: str for col in (*TEXT_COLUMNS, *BOOLEAN_COLUMNS, *STATUS_COLUMNS)},
+}
+
+# CSV rows parsed, cleaned and loaded per pass
+CSV_CHUNK_ROWS = 50_000
+
+# maintenance_work_mem while rebuilding the dropped secondary indexes
+INDEX_BUILD_MEMORY = "1GB"
+
+# Prepared chunks the parsing thread may run ahead of the loader
+PREPARED_QUEUE_SIZE = 4
+
+# sectors.sector_code is VARCHAR(20)
+SECTOR_CODE_LENGTH = 20
+_SECTOR_CODE_TABLE = str.maketrans(" ", "_")
+
+_NULL_STRINGS = frozenset({'nan', 'n/a', '', 'none'})
+
+
+def clean_numeric_column(series):
+    """Convert a column to float, stripping % and thousands separators."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    cleaned = (
+        series.astype(str)
+        .str.replace("%", "", regex=False)
+        .str.replace(",", "", regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def clean_boolean_column(series):
+    """Convert a column of mixed boolean representations; missing is False."""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0).astype(bool)
+    return series.astype(str).str.upper().isin(TRUE_STRINGS)
+
+
+def clean_status_column(series, valid_values):
+    """Keep only recognised status values; everything else becomes None."""
+    stripped = series.astype(str).str.strip().astype(object)
+    valid = stripped.isin(valid_values) & ~stripped.str.lower().isin(_NULL_STRINGS)
+    return stripped.where(valid, None)
+
+
+def preprocess(df):
+    """Clean the fact columns of the CSV frame in place, column by column.
+
+    Afterwards every name in STATEMENT_COLUMNS and METRIC_COLUMNS is a
+    cleaned column ready to be written straight to a COPY buffer.
+    """
+    for col in NUMERIC_COLUMNS:
+        if col in df:
+            df[col] = clean_numeric_column(df[col])
+        else:
+            df[col] = float("nan")
+
+    for col, fallback in RATIO_FALLBACKS.items():
+        # Matches `primary or fallback`: zero also falls through
+        primary = df[col]
+        df[col] = primary.where(primary.notna() & (primary != 0), df[fallback])
+
+    df["data_quality_score"] = df["data_quality_score"].fillna(0).astype(int)
+
+    score = np.trunc(df["profitability_score"])
+    df["profitability_score"] = score.where(score != 0).astype("Int64")
+
+    for col in BOOLEAN_COLUMNS:
+        df[col] = clean_boolean_column(df[col]) if col in df else False
+
+    for col, valid_values in STATUS_COLUMNS.items():
+        df[col] = clean_status_column(df[col], valid_values) if col in df else None
+
+    df["period_end_dt"] = parse_date_column(df["period_end"])
+    add_period_columns(df)
+
+    return df
+
+
+def parse_date_column(series):
+    """Parse a column of dates, trying each of DATE_FORMATS in order; misses are NaT."""
+    text = series.astype(str)
+    parsed = pd.to_datetime(text, format=DATE_FORMATS[0], errors="coerce")
+    for fmt in DATE_FORMATS[1:]:
+        parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+    return parsed
+
+
+def add_period_columns(df):
+    """Derive the fiscal_periods columns for every row at once.
+
+    Adds fiscal_quarter, period_start, fiscal_period_end and period_label;
+    fiscal_year becomes Int64 (NA where missing) and period_type is stripped.
+    Unparsed quarterly dates fall back to mid-year, i.e. Q2.
+    """
+    df["fiscal_year"] = np.trunc(pd.to_numeric(df["fiscal_year"], errors="coerce")).astype("Int64")
+    df["period_type"] = df["period_type"].astype(str).str.strip()
+    annual = df["period_type"].eq("Annual").to_numpy()
+
+    quarter = ((df["period_end_dt"].dt.month.fillna(6).astype(int) - 1) // 3 + 1).to_numpy()
+    df["fiscal_quarter"] = np.where(annual, "FY", np.char.add("Q", quarter.astype(str)))
+
+    years = df["fiscal_year"].astype("float64")
+    df["period_start"] = pd.to_datetime(
+        pd.DataFrame({"year": years, "month": np.where(annual, 1, 3 * quarter - 2), "day": 1}),
+        errors="coerce"
+    )
+    df["fiscal_period_end"] = pd.to_datetime(
+        pd.DataFrame({"year": years, "month": np.where(annual, 12, 3 * quarter), "day": 1}),
+        errors="coerce"
+    ) + pd.offsets.MonthEnd(0)
+
+    year_text = df["fiscal_year"].astype(str)
+    df["period_label"] = np.where(annual, "FY" + year_text, df["fiscal_quarter"] + " " + year_text)
+    return df
 
-def clean_numeric(value):
-    """Clean and convert numeric values."""
-    if pd.isna(value) or value == "" or value is None:
-        return None
-    if isinstance(value, str):
-        value = value.replace("%", "").replace(",", "").strip()
-        if not value:
-            return None
+
+def sector_code(name):
+    """Derive the sectors.sector_code for a sector name (upper case, underscores, 20 chars)."""
+    return name.upper().translate(_SECTOR_CODE_TABLE)[:SECTOR_CODE_LENGTH]
+
+
+def clean_text_column(series):
+    """Strip a text column; missing values, blanks and 'nan' become None."""
+    # object dtype so where() yields None; a str-dtype column would turn it back into NaN
+    stripped = series.astype(str).str.strip().astype(object)
+    present = series.notna() & ~stripped.str.lower().isin({'', 'nan'})
+    return stripped.where(present, None)
+
+
+def prepare_chunk(chunk):
+    """Clean a CSV chunk and add its ticker_key and period_key columns.
+
+    Needs no database access, so it can run off the loading thread.
+    period_key is None for rows without a fiscal_year.
+    """
+    df = preprocess(chunk)
+    df["ticker_key"] = df["ticker"].astype(str).str.strip().str.removesuffix(".0")
+    df["period_key"] = pd.Series(
+        list(zip(df["fiscal_year"].tolist(), df["fiscal_quarter"])), index=df.index, dtype=object
+    ).where(df["fiscal_year"].notna(), None)
+    return df
+
+
+def produce_chunks(chunks, out):
+    """Producer thread: put each prepared chunk on the queue, then None.
+
+    An exception is put on the queue in place of the failing chunk so the
+    consumer can re-raise it.
+    """
     try:
-        result = float(value)
-        # Check for NaN
-        if pd.isna(result):
-            return None
-        return result
-    except:
-        return None
-
-
-def clean_boolean(value):
-    """Convert various boolean representations."""
-    if pd.isna(value):
-        return False
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, str):
-        return value.upper() in ("TRUE", "YES", "1", "T")
-    return bool(value)
-
-
-def clean_status(value, valid_values):
-    """Clean status fields, returning None if invalid."""
-    if pd.isna(value) or value is None:
-        return None
-    val = str(value).strip()
-    if val.lower() in ('nan', 'n/a', '', 'none'):
-        return None
-    if val in valid_values:
-        return val
-    return None
-
-
-def parse_date(date_str):
-    """Parse various date formats."""
-    if pd.isna(date_str) or not date_str:
-        return None
-    for fmt in ["%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y"]:
-        try:
-            return datetime.strptime(str(date_str), fmt)
-        except:
-            continue
-    return None
-
-
-def get_quarter(period_end, period_type):
-    """Determine fiscal quarter from date."""
-    if period_type == "Annual":
-        return "FY"
-    month = period_end.month
-    if month <= 3: return "Q1"
-    elif month <= 6: return "Q2"
-    elif month <= 9: return "Q3"
-    else: return "Q4"
+        for chunk in chunks:
+            out.put(prepare_chunk(chunk))
+    except Exception as e:
+        out.put(e)
+    out.put(None)
+
+
+def load_dimension_caches(cursor):
+    """Read all existing sectors, companies and fiscal periods.
+
+    Returns:
+        (sectors, companies, periods) dicts keyed by sector_name, ticker
+        and (fiscal_year, fiscal_quarter)
+    """
+    cursor.execute("SELECT sector_name, sector_id FROM sectors")
+    sectors = dict(cursor.fetchall())
+    cursor.execute("SELECT ticker, company_id FROM companies")
+    companies = dict(cursor.fetchall())
+    cursor.execute("SELECT fiscal_year, fiscal_quarter, period_id FROM fiscal_periods")
+    periods = {(year, quarter): period_id for year, quarter, period_id in cursor.fetchall()}
+    return sectors, companies, periods
+
+
+def create_missing_dimensions(cursor, df, sectors_cache, companies_cache, periods_cache):
+    """Insert sectors, companies and fiscal periods not yet in the caches.
+
+    Each table gets at most one multi-row INSERT; the caches are updated
+    from the RETURNING rows.
+    """
+    new_companies = (
+        df[df["ticker_key"].notna() & ~df["ticker_key"].isin(companies_cache.keys())]
+        .drop_duplicates("ticker_key")
+    )
+
+    sector_names = clean_text_column(new_companies["sector_derived"].fillna(new_companies["sector_gics"]))
+    new_sectors = sorted(set(sector_names.dropna()) - sectors_cache.keys())
+    if new_sectors:
+        rows = execute_values(
+            cursor,
+            "INSERT INTO sectors (sector_name, sector_code) VALUES %s RETURNING sector_name, sector_id",
+            [(name, sector_code(name)) for name in new_sectors],
+            fetch=True
+        )
+        sectors_cache.update(rows)
+
+    if len(new_companies):
+        company_names = clean_text_column(new_companies["company_name"]).fillna(new_companies["ticker_key"])
+        company_rows = [
+            (ticker, name, sectors_cache.get(sector), company_type, size_category)
+            for ticker, name, sector, company_type, size_category in zip(
+                new_companies["ticker_key"],
+                company_names,
+                sector_names,
+                clean_text_column(new_companies["company_type"]),
+                clean_status_column(new_companies["size_category"], SIZE_CATEGORIES),
+            )
+        ]
+        rows = execute_values(
+            cursor,
+            """INSERT INTO companies (ticker, company_name, sector_id, company_type, size_category)
+               VALUES %s RETURNING ticker, company_id""",
+            company_rows,
+            fetch=True
+        )
+        companies_cache.update(rows)
+
+    new_periods = (
+        df[df["period_key"].notna() & ~df["period_key"].isin(periods_cache.keys())]
+        .drop_duplicates(["fiscal_year", "fiscal_quarter"])
+    )
+    if len(new_periods):
+        period_columns = ["fiscal_year", "fiscal_quarter", "period_type", "period_start", "fiscal_period_end", "period_label"]
+        rows = execute_values(
+            cursor,
+            """INSERT INTO fiscal_periods (fiscal_year, fiscal_quarter, period_type, period_start, period_end, period_label)
+               VALUES %s RETURNING fiscal_year, fiscal_quarter, period_id""",
+            list(zip(*(new_periods[col].tolist() for col in period_columns))),
+            fetch=True
+        )
+        periods_cache.update({(year, quarter): period_id for year, quarter, period_id in rows})
+
+
+def load_existing_keys(cursor):
+    """Read the (company_id, period_id) key of every loaded statement.
+
+    Returns:
+        frozenset of (company_id, period_id) tuples
+    """
+    cursor.execute("SELECT company_id, period_id FROM financial_statements")
+    return frozenset(cursor.fetchall())
+
+
+# Binary COPY framing: signature, flags, header extension length, trailer
+_COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_BINARY_TRAILER = struct.pack(">h", -1)
+_COPY_NULL_FIELD = struct.pack(">i", -1)
+
+_COPY_FIELD_LENGTH = struct.Struct(">i")
+
+
+def _pack_text(value):
+    """Length-prefixed text field holding a float's shortest exact decimal form."""
+    data = repr(float(value)).encode()
+    return _COPY_FIELD_LENGTH.pack(len(data)) + data
+
+
+# Length-prefixed field encoder per staging column type
+_COPY_BINARY_PACKERS = {
+    "int2": partial(struct.Struct(">ih").pack, 2),
+    "int4": partial(struct.Struct(">ii").pack, 4),
+    "bool": partial(struct.Struct(">i?").pack, 1),
+    "text": _pack_text,
+}
+
+
+def to_binary_copy(batch, column_types):
+    """Encode a frame as a COPY ... WITH (FORMAT BINARY) stream.
+
+    Args:
+        batch: Frame holding every column in column_types
+        column_types: Column name -> staging type (a key of _COPY_BINARY_PACKERS)
+
+    Returns:
+        BytesIO positioned at the end of the stream; NaN/None become NULL
+    """
+    buf = io.BytesIO()
+    buf.write(_COPY_BINARY_HEADER)
+    row_header = struct.pack(">h", len(column_types))
+    packers = [_COPY_BINARY_PACKERS[pg_type] for pg_type in column_types.values()]
+    columns = [batch[col].tolist() for col in column_types]
+
+    for row in zip(*columns):
+        parts = [row_header]
+        for pack, value in zip(packers, row):
+            # value != value is the NaN test
+            parts.append(_COPY_NULL_FIELD if value is None or value != value else pack(value))
+        buf.write(b"".join(parts))
+
+    buf.write(_COPY_BINARY_TRAILER)
+    return buf
+
+
+def drop_secondary_indexes(cursor):
+    """Drop the fact tables' indexes that do not back a constraint.
+
+    Primary key and UNIQUE indexes stay, since the ON CONFLICT inserts need
+    them.
+
+    Returns:
+        CREATE INDEX statements (from pg_indexes) for recreate_indexes
+    """
+    cursor.execute("""
+        SELECT format('%I.%I', schemaname, indexname), indexdef
+        FROM pg_indexes
+        WHERE tablename IN ('financial_statements', 'financial_metrics')
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conindid = format('%I.%I', schemaname, indexname)::regclass
+          )
+    """)
+    indexes = cursor.fetchall()
+    for qualified_name, _ in indexes:
+        cursor.execute(f"DROP INDEX {qualified_name}")
+    return [indexdef for _, indexdef in indexes]
+
+
+def recreate_indexes(cursor, index_definitions):
+    """Rebuild dropped indexes, giving each sort INDEX_BUILD_MEMORY."""
+    cursor.execute("SET LOCAL maintenance_work_mem = %s", (INDEX_BUILD_MEMORY,))
+    for indexdef in index_definitions:
+        cursor.execute(indexdef)
+
+
+def create_staging_tables(cursor):
+    """Create session-local staging tables shaped like the fact tables.
+
+    Rows are keyed by (company_id, period_id) because statement_id is only
+    assigned when the staged statements are moved into financial_statements.
+    staging_statements uses the types of STAGING_STATEMENT_TYPES so it can
+    be loaded with binary COPY.
+
+    TEMP tables are never WAL-logged, so they already get the write savings
+    of UNLOGGED tables without leaving a shared table behind after a crash.
+    """
+    fm_cols = ", ".join(f"fm.{col}" for col in METRIC_COLUMNS)
+    fs_defs = ", ".join(f"{col} {pg_type}" for col, pg_type in STAGING_STATEMENT_TYPES.items())
+    cursor.execute(f"CREATE TEMP TABLE staging_statements ({fs_defs})")
+    cursor.execute(f"""
+        CREATE TEMP TABLE staging_metrics AS
+        SELECT fs.company_id, fs.period_id, {fm_cols}
+        FROM financial_metrics fm
+        JOIN financial_statements fs ON fs.statement_id = fm.statement_id
+        WITH NO DATA
+    """)
+
+
+def flush_staged(cursor, fs_buf, fm_buf):
+    """COPY buffered rows into staging and move them into the fact tables.
+
+    Args:
+        cursor: Database cursor
+        fs_buf: Binary COPY stream of STAGING_STATEMENT_TYPES columns
+        fm_buf: CSV rows of company_id, period_id and METRIC_COLUMNS
+
+    Returns:
+        Number of financial_statements rows inserted
+    """
+    fs_cols = ", ".join(STATEMENT_COLUMNS)
+    fm_cols = ", ".join(METRIC_COLUMNS)
+    # Text-staged amounts are parsed as exact decimals
+    fs_values = ", ".join(
+        f"{col}::numeric" if STAGING_STATEMENT_TYPES[col] == "text" else col for col in STATEMENT_COLUMNS
+    )
+
+    fs_buf.seek(0)
+    fm_buf.seek(0)
+    cursor.copy_expert(
+        f"COPY staging_statements (company_id, period_id, {fs_cols}) FROM STDIN WITH (FORMAT BINARY)",
+        fs_buf
+    )
+    cursor.copy_expert(
+        f"COPY staging_metrics (company_id, period_id, {fm_cols}) FROM STDIN WITH (FORMAT CSV)",
+        fm_buf
+    )
+
+    # One statement: new statement_ids flow from the CTE into the metrics insert
+    sm_cols = ", ".join(f"sm.{col}" for col in METRIC_COLUMNS)
+    cursor.execute(f"""
+        WITH s AS (
+            INSERT INTO financial_statements (company_id, period_id, {fs_cols})
+            SELECT company_id, period_id, {fs_values} FROM staging_statements
+            ON CONFLICT (company_id, period_id) DO NOTHING
+            RETURNING statement_id, company_id, period_id
+        ),
+        m AS (
+            INSERT INTO financial_metrics (statement_id, {fm_cols})
+            SELECT s.statement_id, {sm_cols}
+            FROM staging_metrics sm
+            JOIN s ON s.company_id = sm.company_id AND s.period_id = sm.period_id
+            ON CONFLICT (statement_id) DO NOTHING
+        )
+        SELECT COUNT(*) FROM s
+    """)
+    inserted = cursor.fetchone()[0]
+
+    cursor.execute("TRUNCATE staging_statements, staging_metrics")
+    return inserted
 
 
 def main():
@@ -99,234 +519,89 @@ def main():
 
     print(f"\nConnecting to database...")
     conn = psycopg2.connect(DATABASE_URL)
-    conn.autocommit = True  # Commit each statement immediately
     cursor = conn.cursor()
+    # Commit per batch; a crash mid-load loses at most the last unsynced batch
+    cursor.execute("SET synchronous_commit TO OFF")
     print("Connected!")
 
-    # Load CSV
-    print(f"\nLoading {CSV_PATH.name}...")
-    df = pd.read_csv(CSV_PATH, encoding='utf-8-sig')
-    print(f"Loaded {len(df)} records")
-
-    # Caches
-    sectors_cache = {}
-    companies_cache = {}
-    periods_cache = {}
-
-    # Valid status values
-    PROFIT_STATUS = ('Profit', 'Loss', 'N/A')
-    LIQUIDITY_STATUS = ('Strong', 'Moderate', 'Weak', 'Critical')
-    LEVERAGE_STATUS = ('Low', 'Moderate', 'High', 'Critical')
-    ROE_STATUS = ('Excellent', 'Good', 'Average', 'Weak', 'Negative', 'N/A')
-
-    def get_or_create_sector(name):
-        if not name or pd.isna(name):
-            return None
-        name = str(name).strip()
-        if not name or name.lower() == 'nan':
-            return None
-        if name in sectors_cache:
-            return sectors_cache[name]
-
-        cursor.execute("SELECT sector_id FROM sectors WHERE sector_name = %s", (name,))
-        row = cursor.fetchone()
-        if row:
-            sectors_cache[name] = row[0]
-            return row[0]
-
-        cursor.execute(
-            "INSERT INTO sectors (sector_name, sector_code) VALUES (%s, %s) RETURNING sector_id",
-            (name, name.upper().replace(" ", "_")[:20])
-        )
-        sector_id = cursor.fetchone()[0]
-        sectors_cache[name] = sector_id
-        return sector_id
-
-    def get_or_create_company(row):
-        ticker = str(row.get("ticker", "")).strip()
-        # Clean ticker - remove .0 if present
-        if ticker.endswith('.0'):
-            ticker = ticker[:-2]
-
-        if ticker in companies_cache:
-            return companies_cache[ticker]
-
-        cursor.execute("SELECT company_id FROM companies WHERE ticker = %s", (ticker,))
-        result = cursor.fetchone()
-        if result:
-            companies_cache[ticker] = result[0]
-            return result[0]
-
-        sector_name = row.get("sector_derived") or row.get("sector_gics")
-        sector_id = get_or_create_sector(sector_name)
-        company_name = str(row.get("company_name", ticker)).strip()
-        company_type = str(row.get("company_type", "")).strip() or None
-        if company_type and company_type.lower() == 'nan':
-            company_type = None
-        size_category = str(row.get("size_category", "")).strip() or None
-        if size_category and size_category.lower() == 'nan':
-            size_category = None
-
-        cursor.execute("""
-            INSERT INTO companies (ticker, company_name, sector_id, company_type, size_category)
-            VALUES (%s, %s, %s, %s, %s) RETURNING company_id
-        """, (ticker, company_name, sector_id, company_type, size_category))
-
-        company_id = cursor.fetchone()[0]
-        companies_cache[ticker] = company_id
-        return company_id
-
-    def get_or_create_period(row):
-        fiscal_year = int(row.get("fiscal_year", 0))
-        period_type = str(row.get("period_type", "")).strip()
-        period_end = parse_date(row.get("period_end"))
-
-        if not period_end:
-            period_end = datetime(fiscal_year, 12, 31) if period_type == "Annual" else datetime(fiscal_year, 6, 30)
-
-        fiscal_quarter = get_quarter(period_end, period_type)
-        cache_key = f"{fiscal_year}_{fiscal_quarter}"
-
-        if cache_key in periods_cache:
-            return periods_cache[cache_key]
-
-        cursor.execute(
-            "SELECT period_id FROM fiscal_periods WHERE fiscal_year = %s AND fiscal_quarter = %s",
-            (fiscal_year, fiscal_quarter)
-        )
-        result = cursor.fetchone()
-        if result:
-            periods_cache[cache_key] = result[0]
-            return result[0]
-
-        if period_type == "Annual":
-            period_start = datetime(fiscal_year, 1, 1)
-            period_end_dt = datetime(fiscal_year, 12, 31)
-        else:
-            quarter_starts = {"Q1": 1, "Q2": 4, "Q3": 7, "Q4": 10}
-            quarter_ends = {"Q1": 3, "Q2": 6, "Q3": 9, "Q4": 12}
-            period_start = datetime(fiscal_year, quarter_starts.get(fiscal_quarter, 1), 1)
-            end_month = quarter_ends.get(fiscal_quarter, 12)
-            if end_month == 12:
-                period_end_dt = datetime(fiscal_year, 12, 31)
-            else:
-                period_end_dt = datetime(fiscal_year, end_month + 1, 1) - pd.Timedelta(days=1)
-
-        period_label = f"FY{fiscal_year}" if period_type == "Annual" else f"{fiscal_quarter} {fiscal_year}"
-
-        cursor.execute("""
-            INSERT INTO fiscal_periods (fiscal_year, fiscal_quarter, period_type, period_start, period_end, period_label)
-            VALUES (%s, %s, %s, %s, %s, %s) RETURNING period_id
-        """, (fiscal_year, fiscal_quarter, period_type, period_start, period_end_dt, period_label))
-
-        period_id = cursor.fetchone()[0]
-        periods_cache[cache_key] = period_id
-        return period_id
-
     # Process records
-    print("\nMigrating data...")
+    print(f"\nMigrating {CSV_PATH.name}...")
     success = 0
-    errors = 0
     skipped = 0
+    errors = 0
+    total = 0
+
+    # Existing dimension rows and statement keys, one query per table
+    sectors_cache, companies_cache, periods_cache = load_dimension_caches(cursor)
+    loaded_keys = set(load_existing_keys(cursor))
+    create_staging_tables(cursor)
+    conn.commit()
+
+    # CSV parsing and cleaning run on a producer thread while this thread
+    # does all database work; the bounded queue caps chunks held in memory
+    chunks = pd.read_csv(
+        CSV_PATH,
+        encoding='utf-8-sig',
+        usecols=lambda col: col in CSV_DTYPES,
+        dtype=CSV_DTYPES,
+        chunksize=CSV_CHUNK_ROWS,
+    )
+    prepared = queue.Queue(maxsize=PREPARED_QUEUE_SIZE)
+    threading.Thread(target=produce_chunks, args=(chunks, prepared), daemon=True).start()
+
+    # Secondary indexes are rebuilt once after the load instead of per row
+    dropped_indexes = drop_secondary_indexes(cursor)
+    conn.commit()
+    print(f"  Dropped {len(dropped_indexes)} secondary indexes for the load")
 
-    for idx, row in df.iterrows():
-        try:
-            company_id = get_or_create_company(row)
-            period_id = get_or_create_period(row)
-
-            # Check for existing
-            cursor.execute(
-                "SELECT statement_id FROM financial_statements WHERE company_id = %s AND period_id = %s",
-                (company_id, period_id)
+    try:
+        while (df := prepared.get()) is not None:
+            if isinstance(df, Exception):
+                raise df
+            total += len(df)
+            errors += int(df["period_key"].isna().sum())
+
+            # Create missing dimension rows in bulk
+            create_missing_dimensions(cursor, df, sectors_cache, companies_cache, periods_cache)
+            df["company_id"] = df["ticker_key"].map(companies_cache)
+            df["period_id"] = [periods_cache.get(key) for key in df["period_key"]]
+            conn.commit()
+
+            # Drop rows without a resolved key, rows already loaded, and repeats within the CSV
+            resolved = df.dropna(subset=["company_id", "period_id"])
+            errors += int(df["period_key"].notna().sum()) - len(resolved)
+            keys = pd.MultiIndex.from_arrays(
+                [resolved["company_id"].astype(int), resolved["period_id"].astype(int)]
             )
-            existing = cursor.fetchone()
-            if existing:
-                skipped += 1
-                continue
-
-            # Insert financial statement
-            cursor.execute("""
-                INSERT INTO financial_statements (
-                    company_id, period_id,
-                    revenue, cost_of_sales, gross_profit, operating_profit, net_profit, interest_expense,
-                    total_assets, total_equity, total_liabilities, current_assets, current_liabilities,
-                    inventory, receivables, operating_cash_flow, capex, free_cash_flow, working_capital,
-                    data_quality_score, is_latest
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING statement_id
-            """, (
-                company_id, period_id,
-                clean_numeric(row.get("revenue")),
-                clean_numeric(row.get("cost_of_sales")),
-                clean_numeric(row.get("gross_profit")),
-                clean_numeric(row.get("operating_profit")),
-                clean_numeric(row.get("net_profit")),
-                clean_numeric(row.get("interest_expense")),
-                clean_numeric(row.get("total_assets")),
-                clean_numeric(row.get("total_equity")),
-                clean_numeric(row.get("total_liabilities")),
-                clean_numeric(row.get("current_assets")),
-                clean_numeric(row.get("current_liabilities")),
-                clean_numeric(row.get("inventory")),
-                clean_numeric(row.get("receivables")),
-                clean_numeric(row.get("operating_cash_flow")),
-                clean_numeric(row.get("capex")),
-                clean_numeric(row.get("free_cash_flow")),
-                clean_numeric(row.get("working_capital")),
-                int(clean_numeric(row.get("data_quality_score")) or 0),
-                clean_boolean(row.get("is_latest"))
-            ))
-            statement_id = cursor.fetchone()[0]
-
-            # Insert metrics
-            profitability_score = clean_numeric(row.get("profitability_score"))
-            if profitability_score is not None:
-                profitability_score = int(profitability_score)
-                if profitability_score == 0:
-                    profitability_score = None
-
-            cursor.execute("""
-                INSERT INTO financial_metrics (
-                    statement_id, return_on_equity, return_on_assets, gross_margin, operating_margin, net_margin,
-                    current_ratio, quick_ratio, debt_to_equity, debt_to_assets, interest_coverage_ratio,
-                    asset_turnover, inventory_turnover, days_sales_outstanding, profitability_score,
-                    profit_status, liquidity_status, leverage_status, roe_status,
-                    has_cogs, has_operating_profit, has_cash_flow
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                statement_id,
-                clean_numeric(row.get("return_on_equity")) or clean_numeric(row.get("roe_decimal")),
-                clean_numeric(row.get("return_on_assets")) or clean_numeric(row.get("roa_decimal")),
-                clean_numeric(row.get("gross_margin")) or clean_numeric(row.get("gross_margin_decimal")),
-                clean_numeric(row.get("operating_margin")) or clean_numeric(row.get("operating_margin_decimal")),
-                clean_numeric(row.get("net_margin")) or clean_numeric(row.get("net_margin_decimal")),
-                clean_numeric(row.get("current_ratio")),
-                clean_numeric(row.get("quick_ratio")),
-                clean_numeric(row.get("debt_to_equity")),
-                clean_numeric(row.get("debt_to_assets")),
-                clean_numeric(row.get("interest_coverage_ratio")),
-                clean_numeric(row.get("asset_turnover")),
-                clean_numeric(row.get("inventory_turnover")),
-                clean_numeric(row.get("days_sales_outstanding")),
-                profitability_score,
-                clean_status(row.get("profit_status"), PROFIT_STATUS),
-                clean_status(row.get("liquidity_status"), LIQUIDITY_STATUS),
-                clean_status(row.get("leverage_status"), LEVERAGE_STATUS),
-                clean_status(row.get("roe_status"), ROE_STATUS),
-                clean_boolean(row.get("has_cogs")),
-                clean_boolean(row.get("has_operating_profit")),
-                clean_boolean(row.get("has_cash_flow"))
-            ))
-
-            success += 1
-
-            if (idx + 1) % 500 == 0:
-                print(f"  Processed {idx + 1}/{len(df)} records...")
-
-        except Exception as e:
-            errors += 1
-            if errors <= 5:
-                print(f"  Error on row {idx}: {e}")
+            new = ~(keys.isin(loaded_keys) | keys.duplicated())
+            skipped += len(keys) - int(new.sum())
+            loaded_keys.update(keys[new])
+
+            facts = resolved.loc[new, list(STATEMENT_COLUMNS + METRIC_COLUMNS)]
+            facts.insert(0, "period_id", keys.get_level_values(1)[new])
+            facts.insert(0, "company_id", keys.get_level_values(0)[new])
+
+            fm_cols = ["company_id", "period_id", *METRIC_COLUMNS]
+            for start in range(0, len(facts), FLUSH_ROWS):
+                batch = facts.iloc[start:start + FLUSH_ROWS]
+                fs_buf = to_binary_copy(batch, STAGING_STATEMENT_TYPES)
+                fm_buf = io.StringIO()
+                # NaN/None are written as empty unquoted fields, which COPY reads as NULL
+                batch.to_csv(fm_buf, columns=fm_cols, header=False, index=False)
+                try:
+                    success += flush_staged(cursor, fs_buf, fm_buf)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    errors += len(batch)
+                    print(f"  Error loading a batch of {len(batch)} rows: {e}")
+
+            print(f"  Processed {total:,} records...")
+    finally:
+        conn.rollback()  # Leave any failed transaction before rebuilding
+        recreate_indexes(cursor, dropped_indexes)
+        conn.commit()
+        print(f"  Rebuilt {len(dropped_indexes)} secondary indexes")
 
     print(f"\nMigration complete:")
     print(f"  - Success: {success:,}")
@@ -336,12 +611,17 @@ def main():
     print(f"  - Companies: {len(companies_cache)}")
     print(f"  - Periods: {len(periods_cache)}")
 
+    # Fresh planner stats for the refresh and the validation queries below
+    print("\nAnalyzing loaded tables...")
+    vacuum_analyze(conn)
+
     # Refresh materialized view
     print("\nRefreshing materialized view...")
     try:
-        cursor.execute("REFRESH MATERIALIZED VIEW company_financials")
+        refresh_company_financials(conn)
         print("View refreshed!")
     except Exception as e:
+        conn.rollback()
         print(f"Could not refresh view: {e}")
 
     # Validate
@@ -207,6 +207,23 @@ JOIN fiscal_periods fp ON fs.period_id = fp.period_id
 LEFT JOIN sectors s ON c.sector_id = s.sector_id
 LEFT JOIN financial_metrics fm ON fs.statement_id = fm.statement_id;
 
+-- Sector/year aggregates over annual data (refreshed after company_financials)
+CREATE MATERIALIZED VIEW sector_yearly_rollup AS
+SELECT
+    sector,
+    fiscal_year,
+    COUNT(DISTINCT ticker) AS companies,
+    SUM(revenue_millions) AS total_revenue_millions,
+    SUM(net_profit_millions) AS total_net_profit_millions,
+    AVG(revenue_millions) AS avg_revenue_millions,
+    AVG(roe_percent) AS avg_roe_percent,
+    AVG(net_margin_percent) AS avg_net_margin_percent,
+    SUM(CASE WHEN profit_status = 'Profit' THEN 1 ELSE 0 END) AS profitable_companies,
+    SUM(CASE WHEN profit_status = 'Loss' THEN 1 ELSE 0 END) AS loss_making_companies
+FROM company_financials
+WHERE is_annual
+GROUP BY sector, fiscal_year;
+
 -- =============================================================================
 -- INDEXES (Optimized for common Vanna AI query patterns)
 -- =============================================================================
@@ -240,6 +257,10 @@ CREATE UNIQUE INDEX idx_cf_ticker_period ON company_financials(ticker, fiscal_ye
 CREATE INDEX idx_cf_sector ON company_financials(sector);
 CREATE INDEX idx_cf_year ON company_financials(fiscal_year);
 CREATE INDEX idx_cf_latest ON company_financials(is_latest) WHERE is_latest = TRUE;
+CREATE INDEX idx_cf_latest_annual ON company_financials(sector, fiscal_year) WHERE is_latest AND is_annual;
+CREATE INDEX idx_cf_annual_year ON company_financials(fiscal_year) WHERE is_annual;
+CREATE INDEX idx_cf_name_trgm ON company_financials USING gin(company_name gin_trgm_ops);
+CREATE UNIQUE INDEX idx_syr_sector_year ON sector_yearly_rollup(sector, fiscal_year);
 
 -- Vector indexes for semantic search
 CREATE INDEX idx_companies_embedding ON companies USING ivfflat (embedding vector_cosine_ops) WITH (lists = 50);
@@ -487,6 +487,23 @@ LEFT JOIN financial_metrics fm ON fs.statement_id = fm.statement_id;
 
 COMMENT ON MATERIALIZED VIEW company_financials IS 'Enhanced denormalized view with bank and insurance metrics - values in millions SAR and percentages';
 
+-- Recreate the rollup dropped by CASCADE above
+CREATE MATERIALIZED VIEW sector_yearly_rollup AS
+SELECT
+    sector,
+    fiscal_year,
+    COUNT(DISTINCT ticker) AS companies,
+    SUM(revenue_millions) AS total_revenue_millions,
+    SUM(net_profit_millions) AS total_net_profit_millions,
+    AVG(revenue_millions) AS avg_revenue_millions,
+    AVG(roe_percent) AS avg_roe_percent,
+    AVG(net_margin_percent) AS avg_net_margin_percent,
+    SUM(CASE WHEN profit_status = 'Profit' THEN 1 ELSE 0 END) AS profitable_companies,
+    SUM(CASE WHEN profit_status = 'Loss' THEN 1 ELSE 0 END) AS loss_making_companies
+FROM company_financials
+WHERE is_annual
+GROUP BY sector, fiscal_year;
+
 -- =============================================================================
 -- 7. CREATE INDEXES
 -- =============================================================================
@@ -497,6 +514,10 @@ CREATE INDEX IF NOT EXISTS idx_cf_sector ON company_financials(sector);
 CREATE INDEX IF NOT EXISTS idx_cf_institution_type ON company_financials(institution_type);
 CREATE INDEX IF NOT EXISTS idx_cf_year ON company_financials(fiscal_year);
 CREATE INDEX IF NOT EXISTS idx_cf_latest ON company_financials(is_latest) WHERE is_latest = TRUE;
+CREATE INDEX IF NOT EXISTS idx_cf_latest_annual ON company_financials(sector, fiscal_year) WHERE is_latest AND is_annual;
+CREATE INDEX IF NOT EXISTS idx_cf_annual_year ON company_financials(fiscal_year) WHERE is_annual;
+CREATE INDEX IF NOT EXISTS idx_cf_name_trgm ON company_financials USING gin(company_name gin_trgm_ops);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_syr_sector_year ON sector_yearly_rollup(sector, fiscal_year);
 CREATE INDEX IF NOT EXISTS idx_cf_2024 ON company_financials(fiscal_year) WHERE fiscal_year = 2024;
 CREATE INDEX IF NOT EXISTS idx_cf_profit_status ON company_financials(profit_status);
 
@@ -626,6 +647,7 @@ $$ LANGUAGE plpgsql;
 -- =============================================================================
 
 REFRESH MATERIALIZED VIEW company_financials;
+REFRESH MATERIALIZED VIEW sector_yearly_rollup;
 
 -- =============================================================================
 -- 10. VALIDATION QUERIES
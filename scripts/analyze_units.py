@@ -1,17 +1,65 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import io
 import json
 import os
+import sys
+from functools import partial
+
+# Only the columns this analysis reads; everything else is never decoded
+CSV_COLUMN_TYPES = {
+    'ticker': pa.float64(),  # stored as e.g. "2222.0"
+    'company_name': pa.string(),
+    'fiscal_year': pa.float64(),
+    'is_annual': pa.bool_(),
+    'revenue': pa.float64(),
+    'total_assets': pa.float64(),
+    'net_profit': pa.float64(),
+}
+CSV_BLOCK_SIZE = 16 << 20  # Bytes of CSV text decoded per streamed batch
+
+# All report lines go into one buffer, written to stdout once at the end
+out = io.StringIO()
+emit = partial(print, file=out)
+
+
+def emit_revenue_lines(rows):
+    """Emit "  ticker - name: revenue" lines, built column-wise rather than per row."""
+    if rows.empty:
+        return
+    lines = (
+        '  ' + rows['ticker'].astype(str) + ' - ' + rows['company_name']
+        + ': ' + rows['revenue'].map('{:,.0f}'.format)
+    )
+    emit('\n'.join(lines))
 
-# Read the CSV
-df = pd.read_csv(r'C:\Users\User\venna-ai\TASI_financials_DB.csv')
 
-# Focus on annual data for clarity
-annual_df = df[df['is_annual'] == True].copy()
+# Stream the CSV in blocks, keeping only annual rows of each block, so peak
+# memory follows the block size rather than the file size
+reader = pacsv.open_csv(
+    r'C:\Users\User\venna-ai\TASI_financials_DB.csv',
+    read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+    convert_options=pacsv.ConvertOptions(
+        include_columns=list(CSV_COLUMN_TYPES),
+        column_types=CSV_COLUMN_TYPES,
+    ),
+)
+annual_df = pa.Table.from_batches(
+    (batch.filter(batch.column('is_annual')) for batch in reader),
+    schema=reader.schema,
+).to_pandas()
+
+# Tickers and years are whole numbers; nullable ints tolerate blank rows.
+# Amounts stay float64: float32 keeps only ~7 significant digits, which would
+# change the printed SAR figures.
+annual_df = annual_df.astype({'ticker': 'Int32', 'fiscal_year': 'Int16'})
 
 # Get unique companies
 companies = annual_df[['ticker', 'company_name']].drop_duplicates()
-print(f"Total unique companies: {len(companies)}")
-print("\n" + "="*80)
+emit(f"Total unique companies: {len(companies)}")
+emit("\n" + "="*80)
 
 # Major companies we know should have large revenues
 major_companies = {
@@ -32,58 +80,73 @@ major_companies = {
 }
 
 # Get the latest annual data for each company
-latest_annual = annual_df.sort_values('fiscal_year').groupby('ticker').last().reset_index()
-
-print("\nAnalyzing major companies (latest annual data):")
-print("-" * 80)
-for ticker, expected_name in major_companies.items():
-    ticker_int = int(ticker)
-    company_data = latest_annual[latest_annual['ticker'] == ticker_int]
-    if not company_data.empty:
-        row = company_data.iloc[0]
-        revenue = row['revenue'] if pd.notna(row['revenue']) else 0
-        total_assets = row['total_assets'] if pd.notna(row['total_assets']) else 0
-        net_profit = row['net_profit'] if pd.notna(row['net_profit']) else 0
-        company_name = row['company_name']
-        year = row['fiscal_year']
-        print(f"\n{ticker} - {company_name} ({year})")
-        print(f"  Revenue: {revenue:,.0f}")
-        print(f"  Total Assets: {total_assets:,.0f}")
-        print(f"  Net Profit: {net_profit:,.0f}")
-    else:
-        print(f"\n{ticker} - {expected_name}: NOT FOUND")
+latest_annual = annual_df.loc[annual_df.groupby('ticker', sort=False)['fiscal_year'].idxmax()].reset_index(drop=True)
+
+emit("\nAnalyzing major companies (latest annual data):")
+emit("-" * 80)
+# One left join of the major tickers against the latest annual rows
+majors = pd.DataFrame({
+    'ticker': [int(t) for t in major_companies],
+    'expected_name': list(major_companies.values()),
+})
+merged = majors.merge(
+    latest_annual[['ticker', 'company_name', 'fiscal_year', 'revenue', 'total_assets', 'net_profit']],
+    on='ticker',
+    how='left',
+)
+merged['company_name'] = merged['company_name'].fillna('NOT FOUND')
+amount = '{:,.0f}'.format
+emit(merged.to_string(
+    index=False,
+    na_rep='N/A',
+    formatters={
+        'fiscal_year': '{:.0f}'.format,
+        'revenue': amount,
+        'total_assets': amount,
+        'net_profit': amount,
+    },
+))
 
 # Now analyze all companies to detect unit patterns
-print("\n" + "="*80)
-print("\nAnalyzing all companies to detect unit patterns...")
-print("-" * 80)
+emit("\n" + "="*80)
+emit("\nAnalyzing all companies to detect unit patterns...")
+emit("-" * 80)
 
 # Get statistics on revenue values
-all_revenues = latest_annual[latest_annual['revenue'].notna()]['revenue']
-print(f"\nRevenue statistics across all companies:")
-print(f"  Min: {all_revenues.min():,.0f}")
-print(f"  Max: {all_revenues.max():,.0f}")
-print(f"  Mean: {all_revenues.mean():,.0f}")
-print(f"  Median: {all_revenues.median():,.0f}")
+# Sort the companies that report revenue once; the small/large sections
+# below are a prefix and a suffix of this order found by binary search
+latest_with_rev = latest_annual.dropna(subset=['revenue']).sort_values('revenue')
+revenue = latest_with_rev['revenue'].to_numpy()
+
+emit(f"\nRevenue statistics across all companies:")
+emit(f"  Min: {revenue[0]:,.0f}")
+emit(f"  Max: {revenue[-1]:,.0f}")
+emit(f"  Mean: {revenue.mean():,.0f}")
+emit(f"  Median: {np.median(revenue):,.0f}")
 
 # Companies with very small revenue (< 1 billion SAR) - potential millions unit
-small_rev = latest_annual[(latest_annual['revenue'].notna()) & (latest_annual['revenue'] < 1_000_000_000)]
-print(f"\n\nCompanies with revenue < 1 billion (potential unit issue):")
-print("-" * 80)
-for _, row in small_rev.sort_values('revenue').iterrows():
-    print(f"  {int(row['ticker'])} - {row['company_name']}: {row['revenue']:,.0f}")
+small_rev = latest_with_rev.iloc[:revenue.searchsorted(1_000_000_000)]
+emit(f"\n\nCompanies with revenue < 1 billion (potential unit issue):")
+emit("-" * 80)
+emit_revenue_lines(small_rev)
 
 # Companies with very large revenue (> 100 billion SAR) - likely full SAR
-large_rev = latest_annual[(latest_annual['revenue'].notna()) & (latest_annual['revenue'] > 100_000_000_000)]
-print(f"\n\nCompanies with revenue > 100 billion (likely full SAR):")
-print("-" * 80)
-for _, row in large_rev.sort_values('revenue', ascending=False).iterrows():
-    print(f"  {int(row['ticker'])} - {row['company_name']}: {row['revenue']:,.0f}")
+large_rev = latest_with_rev.iloc[revenue.searchsorted(100_000_000_000, side='right'):].iloc[::-1]
+emit(f"\n\nCompanies with revenue > 100 billion (likely full SAR):")
+emit("-" * 80)
+emit_revenue_lines(large_rev)
 
 # Print all unique tickers with their latest revenue for reference
-print("\n" + "="*80)
-print("\nAll companies - Latest Annual Revenue (sorted by revenue):")
-print("-" * 80)
-latest_with_rev = latest_annual[latest_annual['revenue'].notna()].sort_values('revenue')
-for _, row in latest_with_rev.iterrows():
-    print(f"{int(row['ticker'])},{row['company_name']},{row['revenue']:.0f},{row['fiscal_year']}")
+emit("\n" + "="*80)
+emit("\nAll companies - Latest Annual Revenue (sorted by revenue):")
+emit("-" * 80)
+latest_with_rev.to_csv(
+    out,
+    columns=['ticker', 'company_name', 'revenue', 'fiscal_year'],
+    header=False,
+    index=False,
+    float_format='%.0f',
+    lineterminator='\n',
+)
+
+sys.stdout.write(out.getvalue())
@@ -22,7 +22,7 @@ Insurance companies use:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 import json
@@ -34,7 +34,7 @@ class InstitutionType(Enum):
     FINANCE = "finance"
     STANDARD = "standard"
 
-@dataclass
+@dataclass(slots=True)
 class BankMetrics:
     """Bank-specific financial metrics"""
     ticker: int
@@ -65,7 +65,7 @@ class BankMetrics:
     return_on_equity: Optional[float] = None
     return_on_assets: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class InsuranceMetrics:
     """Insurance company-specific financial metrics"""
     ticker: int
@@ -138,52 +138,73 @@ FINANCE_COMPANY_TICKERS = {
     1183: "Saudi Home Loans Co.",
 }
 
+# ticker -> InstitutionType for every non-standard ticker (the groups are disjoint)
+_INST_TYPE_LOOKUP = (
+    {t: InstitutionType.BANK for t in BANK_TICKERS}
+    | {t: InstitutionType.INSURANCE for t in INSURANCE_TICKERS}
+    | {t: InstitutionType.FINANCE for t in FINANCE_COMPANY_TICKERS}
+)
+
+# Fixed category order (bank, insurance, finance, standard) for institution_type
+INSTITUTION_TYPE_DTYPE = pd.CategoricalDtype([t.value for t in InstitutionType])
+
+# Sorted int32 ticker arrays for np.isin over a whole ticker column
+_BANK_ARR = np.array(sorted(BANK_TICKERS), dtype=np.int32)
+_INS_ARR = np.array(sorted(INSURANCE_TICKERS), dtype=np.int32)
+_FIN_ARR = np.array(sorted(FINANCE_COMPANY_TICKERS), dtype=np.int32)
+
+# (ticker, name) pairs in ticker order, for the report
+_BANK_TICKERS_SORTED = tuple(sorted(BANK_TICKERS.items()))
+_INSURANCE_TICKERS_SORTED = tuple(sorted(INSURANCE_TICKERS.items()))
+
 
 def get_institution_type(ticker: int) -> InstitutionType:
     """Determine the type of financial institution based on ticker"""
-    if ticker in BANK_TICKERS:
-        return InstitutionType.BANK
-    elif ticker in INSURANCE_TICKERS:
-        return InstitutionType.INSURANCE
-    elif ticker in FINANCE_COMPANY_TICKERS:
-        return InstitutionType.FINANCE
-    else:
-        return InstitutionType.STANDARD
+    return _INST_TYPE_LOOKUP.get(ticker, InstitutionType.STANDARD)
 
 
 def calculate_bank_ratios(metrics: BankMetrics) -> BankMetrics:
     """
     Calculate bank-specific ratios from raw metrics
     """
+    # Read each input once; denominators must be present and non-zero
+    nii = metrics.net_interest_income
+    total_assets = metrics.total_assets
+    total_operating_income = metrics.total_operating_income
+    total_loans = metrics.total_loans
+    risk_weighted_assets = metrics.risk_weighted_assets
+    net_profit = metrics.net_profit
+    total_equity = metrics.total_equity
+
     # Net Interest Margin = Net Interest Income / Average Interest-Earning Assets
-    if metrics.net_interest_income and metrics.total_assets:
+    if nii is not None and total_assets:
         # Approximation: using total assets as proxy for interest-earning assets
-        metrics.net_interest_margin = (metrics.net_interest_income / metrics.total_assets) * 100
+        metrics.net_interest_margin = (nii / total_assets) * 100
 
     # Cost-to-Income Ratio = Operating Expenses / Total Operating Income
-    if metrics.operating_expenses and metrics.total_operating_income and metrics.total_operating_income != 0:
-        metrics.cost_to_income_ratio = (metrics.operating_expenses / metrics.total_operating_income) * 100
+    if metrics.operating_expenses is not None and total_operating_income:
+        metrics.cost_to_income_ratio = (metrics.operating_expenses / total_operating_income) * 100
 
     # Loan-to-Deposit Ratio = Total Loans / Total Deposits
-    if metrics.total_loans and metrics.total_deposits and metrics.total_deposits != 0:
-        metrics.loan_to_deposit_ratio = (metrics.total_loans / metrics.total_deposits) * 100
+    if total_loans is not None and metrics.total_deposits:
+        metrics.loan_to_deposit_ratio = (total_loans / metrics.total_deposits) * 100
 
     # NPL Ratio = Non-Performing Loans / Total Loans
-    if metrics.non_performing_loans is not None and metrics.total_loans and metrics.total_loans != 0:
-        metrics.npl_ratio = (metrics.non_performing_loans / metrics.total_loans) * 100
+    if metrics.non_performing_loans is not None and total_loans:
+        metrics.npl_ratio = (metrics.non_performing_loans / total_loans) * 100
 
     # Capital Adequacy Ratio = (Tier 1 + Tier 2 Capital) / Risk-Weighted Assets
-    if metrics.tier1_capital and metrics.risk_weighted_assets and metrics.risk_weighted_assets != 0:
-        metrics.capital_adequacy_ratio = (metrics.tier1_capital / metrics.risk_weighted_assets) * 100
+    if metrics.tier1_capital is not None and risk_weighted_assets:
+        metrics.capital_adequacy_ratio = (metrics.tier1_capital / risk_weighted_assets) * 100
         metrics.tier1_ratio = metrics.capital_adequacy_ratio  # Simplified
 
     # Return on Equity = Net Profit / Total Equity
-    if metrics.net_profit and metrics.total_equity and metrics.total_equity != 0:
-        metrics.return_on_equity = (metrics.net_profit / metrics.total_equity) * 100
+    if net_profit is not None and total_equity:
+        metrics.return_on_equity = (net_profit / total_equity) * 100
 
     # Return on Assets = Net Profit / Total Assets
-    if metrics.net_profit and metrics.total_assets and metrics.total_assets != 0:
-        metrics.return_on_assets = (metrics.net_profit / metrics.total_assets) * 100
+    if net_profit is not None and total_assets:
+        metrics.return_on_assets = (net_profit / total_assets) * 100
 
     return metrics
 
@@ -193,7 +214,7 @@ def calculate_insurance_ratios(metrics: InsuranceMetrics) -> InsuranceMetrics:
     Calculate insurance-specific ratios from raw metrics
     """
     # Loss Ratio = Claims Incurred / Net Earned Premiums
-    if metrics.claims_incurred and metrics.net_earned_premiums and metrics.net_earned_premiums != 0:
+    if metrics.claims_incurred is not None and metrics.net_earned_premiums and metrics.net_earned_premiums != 0:
         metrics.loss_ratio = (metrics.claims_incurred / metrics.net_earned_premiums) * 100
 
     # Expense Ratio = (Acquisition Costs + Operating Expenses) / Net Earned Premiums
@@ -206,24 +227,133 @@ def calculate_insurance_ratios(metrics: InsuranceMetrics) -> InsuranceMetrics:
         metrics.combined_ratio = metrics.loss_ratio + metrics.expense_ratio
 
     # Retention Ratio = Net Written Premiums / Gross Written Premiums
-    if metrics.net_written_premiums and metrics.gross_written_premiums and metrics.gross_written_premiums != 0:
+    if metrics.net_written_premiums is not None and metrics.gross_written_premiums and metrics.gross_written_premiums != 0:
         metrics.retention_ratio = (metrics.net_written_premiums / metrics.gross_written_premiums) * 100
 
     # Return on Equity
-    if metrics.net_profit and metrics.total_equity and metrics.total_equity != 0:
+    if metrics.net_profit is not None and metrics.total_equity and metrics.total_equity != 0:
         metrics.return_on_equity = (metrics.net_profit / metrics.total_equity) * 100
 
     # Return on Assets
-    if metrics.net_profit and metrics.total_assets and metrics.total_assets != 0:
+    if metrics.net_profit is not None and metrics.total_assets and metrics.total_assets != 0:
         metrics.return_on_assets = (metrics.net_profit / metrics.total_assets) * 100
 
     # Solvency Ratio = Total Equity / Technical Reserves (simplified)
-    if metrics.total_equity and metrics.technical_reserves and metrics.technical_reserves != 0:
+    if metrics.total_equity is not None and metrics.technical_reserves and metrics.technical_reserves != 0:
         metrics.solvency_ratio = (metrics.total_equity / metrics.technical_reserves) * 100
 
     return metrics
 
 
+# Source columns read when building BankMetrics / InsuranceMetrics, in order
+_METRIC_SOURCE_COLUMNS = ('ticker', 'fiscal_year', 'period_type', 'net_profit', 'total_assets', 'total_equity')
+
+# Ratio columns added by the vectorized calculators (named like the dataclass fields)
+_BANK_RATIO_COLUMNS = (
+    'net_interest_margin', 'cost_to_income_ratio', 'loan_to_deposit_ratio', 'npl_ratio',
+    'capital_adequacy_ratio', 'tier1_ratio', 'return_on_equity', 'return_on_assets',
+)
+_INSURANCE_RATIO_COLUMNS = (
+    'loss_ratio', 'expense_ratio', 'combined_ratio', 'retention_ratio',
+    'return_on_equity', 'return_on_assets', 'solvency_ratio',
+)
+
+
+def _metric_rows(data: pd.DataFrame, columns):
+    """Iterate the given columns as plain tuples, one NumPy array per column."""
+    return zip(*(data[column].to_numpy() for column in columns))
+
+
+def _optional(value):
+    """Return None for a missing (NaN) value, else the value itself."""
+    return None if pd.isna(value) else value
+
+
+def _column(data: pd.DataFrame, name: str) -> pd.Series:
+    """Return a column as float, or all-NaN when the frame does not have it."""
+    if name in data:
+        return data[name].astype(float)
+    return pd.Series(np.nan, index=data.index)
+
+
+def _truthy(values: pd.Series) -> pd.Series:
+    """Vector form of the scalar `if value:` guard: present and non-zero."""
+    return values.notna() & (values != 0)
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series) -> np.ndarray:
+    """numerator / denominator * 100 where the numerator is present and the denominator non-zero, else NaN.
+
+    A zero numerator is a real value and gives a 0 ratio, not a missing one.
+    """
+    valid = numerator.notna() & _truthy(denominator)
+    return np.where(valid, numerator / denominator.where(valid) * 100, np.nan)
+
+
+def compute_bank_ratios_vec(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized calculate_bank_ratios over a frame of bank rows
+
+    Raw inputs are read from the columns named like the BankMetrics fields;
+    absent columns count as missing. Returns a copy with the ratio columns added.
+    """
+    nii = _column(data, 'net_interest_income')
+    operating_expenses = _column(data, 'operating_expenses')
+    total_operating_income = _column(data, 'total_operating_income')
+    total_loans = _column(data, 'total_loans')
+    total_deposits = _column(data, 'total_deposits')
+    npl = _column(data, 'non_performing_loans')
+    tier1_capital = _column(data, 'tier1_capital')
+    rwa = _column(data, 'risk_weighted_assets')
+    net_profit = _column(data, 'net_profit')
+    total_equity = _column(data, 'total_equity')
+    total_assets = _column(data, 'total_assets')
+
+    capital_adequacy_ratio = _ratio(tier1_capital, rwa)
+    return data.assign(
+        net_interest_margin=_ratio(nii, total_assets),
+        cost_to_income_ratio=_ratio(operating_expenses, total_operating_income),
+        loan_to_deposit_ratio=_ratio(total_loans, total_deposits),
+        npl_ratio=_ratio(npl, total_loans),
+        capital_adequacy_ratio=capital_adequacy_ratio,
+        tier1_ratio=capital_adequacy_ratio,  # Simplified
+        return_on_equity=_ratio(net_profit, total_equity),
+        return_on_assets=_ratio(net_profit, total_assets),
+    )
+
+
+def compute_insurance_ratios_vec(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized calculate_insurance_ratios over a frame of insurance rows
+
+    Raw inputs are read from the columns named like the InsuranceMetrics
+    fields; absent columns count as missing. Returns a copy with the ratio
+    columns added.
+    """
+    gwp = _column(data, 'gross_written_premiums')
+    nwp = _column(data, 'net_written_premiums')
+    nep = _column(data, 'net_earned_premiums')
+    claims = _column(data, 'claims_incurred')
+    acquisition_costs = _column(data, 'policy_acquisition_costs')
+    operating_expenses = _column(data, 'operating_expenses')
+    net_profit = _column(data, 'net_profit')
+    total_equity = _column(data, 'total_equity')
+    total_assets = _column(data, 'total_assets')
+    technical_reserves = _column(data, 'technical_reserves')
+
+    loss_ratio = _ratio(claims, nep)
+    expense_ratio = _ratio(acquisition_costs.fillna(0) + operating_expenses.fillna(0), nep)
+    return data.assign(
+        loss_ratio=loss_ratio,
+        expense_ratio=expense_ratio,
+        combined_ratio=loss_ratio + expense_ratio,  # NaN unless both exist
+        retention_ratio=_ratio(nwp, gwp),
+        return_on_equity=_ratio(net_profit, total_equity),
+        return_on_assets=_ratio(net_profit, total_assets),
+        solvency_ratio=_ratio(total_equity, technical_reserves),
+    )
+
+
 def process_bank_data(df: pd.DataFrame, ticker: int) -> List[BankMetrics]:
     """
     Process raw financial data for a bank and calculate bank-specific metrics
@@ -234,22 +364,19 @@ def process_bank_data(df: pd.DataFrame, ticker: int) -> List[BankMetrics]:
     - total_assets -> total_assets
     - total_equity -> total_equity
     """
-    bank_data = df[df['ticker'] == ticker].copy()
+    bank_data = compute_bank_ratios_vec(df.loc[df['ticker'] == ticker, list(_METRIC_SOURCE_COLUMNS)])
+    value_fields = _METRIC_SOURCE_COLUMNS[3:] + _BANK_RATIO_COLUMNS
     results = []
 
-    for _, row in bank_data.iterrows():
-        metrics = BankMetrics(
-            ticker=int(row['ticker']),
-            fiscal_year=int(row['fiscal_year']) if pd.notna(row['fiscal_year']) else None,
-            period_type=row['period_type'],
-            net_profit=row['net_profit'] if pd.notna(row['net_profit']) else None,
-            total_assets=row['total_assets'] if pd.notna(row['total_assets']) else None,
-            total_equity=row['total_equity'] if pd.notna(row['total_equity']) else None,
-        )
-
-        # Calculate ratios based on available data
-        metrics = calculate_bank_ratios(metrics)
-        results.append(metrics)
+    for row_ticker, fiscal_year, period_type, *values in _metric_rows(
+        bank_data, _METRIC_SOURCE_COLUMNS[:3] + value_fields
+    ):
+        results.append(BankMetrics(
+            ticker=int(row_ticker),
+            fiscal_year=int(fiscal_year) if pd.notna(fiscal_year) else None,
+            period_type=period_type,
+            **{field: _optional(value) for field, value in zip(value_fields, values)},
+        ))
 
     return results
 
@@ -262,90 +389,115 @@ def process_insurance_data(df: pd.DataFrame, ticker: int) -> List[InsuranceMetri
     - Revenue is typically NULL; use gross_written_premiums if available
     - net_profit -> remains as net_profit
     """
-    insurance_data = df[df['ticker'] == ticker].copy()
+    insurance_data = compute_insurance_ratios_vec(df.loc[df['ticker'] == ticker, list(_METRIC_SOURCE_COLUMNS)])
+    value_fields = _METRIC_SOURCE_COLUMNS[3:] + _INSURANCE_RATIO_COLUMNS
     results = []
 
-    for _, row in insurance_data.iterrows():
-        metrics = InsuranceMetrics(
-            ticker=int(row['ticker']),
-            fiscal_year=int(row['fiscal_year']) if pd.notna(row['fiscal_year']) else None,
-            period_type=row['period_type'],
-            net_profit=row['net_profit'] if pd.notna(row['net_profit']) else None,
-            total_assets=row['total_assets'] if pd.notna(row['total_assets']) else None,
-            total_equity=row['total_equity'] if pd.notna(row['total_equity']) else None,
-        )
-
-        # Calculate ratios based on available data
-        metrics = calculate_insurance_ratios(metrics)
-        results.append(metrics)
+    for row_ticker, fiscal_year, period_type, *values in _metric_rows(
+        insurance_data, _METRIC_SOURCE_COLUMNS[:3] + value_fields
+    ):
+        results.append(InsuranceMetrics(
+            ticker=int(row_ticker),
+            fiscal_year=int(fiscal_year) if pd.notna(fiscal_year) else None,
+            period_type=period_type,
+            **{field: _optional(value) for field, value in zip(value_fields, values)},
+        ))
 
     return results
 
 
+def process_all_banks(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bank metrics for every bank ticker in one pass
+
+    Same values as process_bank_data over each ticker, as one frame with the
+    source columns plus the ratio columns (accepted by create_unified_metrics_df).
+    """
+    bank_rows = df['ticker'].isin(_BANK_ARR)
+    return compute_bank_ratios_vec(df.loc[bank_rows, list(_METRIC_SOURCE_COLUMNS)])
+
+
+def process_all_insurance(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Insurance metrics for every insurance ticker in one pass
+
+    Frame counterpart of process_insurance_data, like process_all_banks.
+    """
+    insurance_rows = df['ticker'].isin(_INS_ARR)
+    return compute_insurance_ratios_vec(df.loc[insurance_rows, list(_METRIC_SOURCE_COLUMNS)])
+
+
+# Unified layout per institution type: company names, primary income
+# (metric label, preferred column, fallback column) and the five key ratios
+_UNIFIED_LAYOUTS = {
+    'BANK': (
+        BANK_TICKERS,
+        ('Net Interest Income', 'net_interest_income', 'total_operating_income'),
+        (
+            ('Net Interest Margin', 'net_interest_margin'),
+            ('Cost-to-Income Ratio', 'cost_to_income_ratio'),
+            ('Loan-to-Deposit Ratio', 'loan_to_deposit_ratio'),
+            ('NPL Ratio', 'npl_ratio'),
+            ('Capital Adequacy Ratio', 'capital_adequacy_ratio'),
+        ),
+    ),
+    'INSURANCE': (
+        INSURANCE_TICKERS,
+        ('Gross Written Premiums', 'gross_written_premiums', 'net_earned_premiums'),
+        (
+            ('Loss Ratio', 'loss_ratio'),
+            ('Combined Ratio', 'combined_ratio'),
+            ('Expense Ratio', 'expense_ratio'),
+            ('Retention Ratio', 'retention_ratio'),
+            ('Solvency Ratio', 'solvency_ratio'),
+        ),
+    ),
+}
+
+
+def _unified_frame(data: pd.DataFrame, institution_type: str) -> pd.DataFrame:
+    """Reshape one institution type's metric columns into the unified schema."""
+    names, (income_metric, income_column, fallback_column), key_ratios = _UNIFIED_LAYOUTS[institution_type]
+    income = _column(data, income_column)
+    unified = pd.DataFrame({
+        'ticker': data['ticker'],
+        'company_name': data['ticker'].map(names).fillna('Unknown'),
+        'institution_type': institution_type,
+        'fiscal_year': data['fiscal_year'],
+        'period_type': data['period_type'],
+        # Same as `preferred or fallback`: a zero preferred value falls back too
+        'primary_income': income.where(_truthy(income), _column(data, fallback_column)),
+        'primary_income_metric': income_metric,
+        'net_profit': _column(data, 'net_profit'),
+        'total_assets': _column(data, 'total_assets'),
+        'total_equity': _column(data, 'total_equity'),
+        'roe_pct': _column(data, 'return_on_equity'),
+        'roa_pct': _column(data, 'return_on_assets'),
+    }, index=data.index)
+    for number, (label, column) in enumerate(key_ratios, start=1):
+        unified[f'key_ratio_{number}_name'] = label
+        unified[f'key_ratio_{number}_value'] = _column(data, column)
+    return unified
+
+
 def create_unified_metrics_df(
-    bank_metrics: List[BankMetrics],
-    insurance_metrics: List[InsuranceMetrics]
+    bank_metrics: Union[List[BankMetrics], pd.DataFrame],
+    insurance_metrics: Union[List[InsuranceMetrics], pd.DataFrame]
 ) -> pd.DataFrame:
     """
     Create a unified DataFrame with metrics for all financial institutions
+
+    Each argument is either a list of BankMetrics/InsuranceMetrics or a frame
+    with the same columns, such as compute_bank_ratios_vec() output.
     """
-    records = []
-
-    # Process bank metrics
-    for m in bank_metrics:
-        records.append({
-            'ticker': m.ticker,
-            'company_name': BANK_TICKERS.get(m.ticker, 'Unknown'),
-            'institution_type': 'BANK',
-            'fiscal_year': m.fiscal_year,
-            'period_type': m.period_type,
-            'primary_income': m.net_interest_income or m.total_operating_income,
-            'primary_income_metric': 'Net Interest Income',
-            'net_profit': m.net_profit,
-            'total_assets': m.total_assets,
-            'total_equity': m.total_equity,
-            'roe_pct': m.return_on_equity,
-            'roa_pct': m.return_on_assets,
-            'key_ratio_1_name': 'Net Interest Margin',
-            'key_ratio_1_value': m.net_interest_margin,
-            'key_ratio_2_name': 'Cost-to-Income Ratio',
-            'key_ratio_2_value': m.cost_to_income_ratio,
-            'key_ratio_3_name': 'Loan-to-Deposit Ratio',
-            'key_ratio_3_value': m.loan_to_deposit_ratio,
-            'key_ratio_4_name': 'NPL Ratio',
-            'key_ratio_4_value': m.npl_ratio,
-            'key_ratio_5_name': 'Capital Adequacy Ratio',
-            'key_ratio_5_value': m.capital_adequacy_ratio,
-        })
-
-    # Process insurance metrics
-    for m in insurance_metrics:
-        records.append({
-            'ticker': m.ticker,
-            'company_name': INSURANCE_TICKERS.get(m.ticker, 'Unknown'),
-            'institution_type': 'INSURANCE',
-            'fiscal_year': m.fiscal_year,
-            'period_type': m.period_type,
-            'primary_income': m.gross_written_premiums or m.net_earned_premiums,
-            'primary_income_metric': 'Gross Written Premiums',
-            'net_profit': m.net_profit,
-            'total_assets': m.total_assets,
-            'total_equity': m.total_equity,
-            'roe_pct': m.return_on_equity,
-            'roa_pct': m.return_on_assets,
-            'key_ratio_1_name': 'Loss Ratio',
-            'key_ratio_1_value': m.loss_ratio,
-            'key_ratio_2_name': 'Combined Ratio',
-            'key_ratio_2_value': m.combined_ratio,
-            'key_ratio_3_name': 'Expense Ratio',
-            'key_ratio_3_value': m.expense_ratio,
-            'key_ratio_4_name': 'Retention Ratio',
-            'key_ratio_4_value': m.retention_ratio,
-            'key_ratio_5_name': 'Solvency Ratio',
-            'key_ratio_5_value': m.solvency_ratio,
-        })
-
-    return pd.DataFrame(records)
+    frames = [
+        _unified_frame(pd.DataFrame(metrics), institution_type)
+        for institution_type, metrics in (('BANK', bank_metrics), ('INSURANCE', insurance_metrics))
+        if len(metrics)
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
 
 
 def update_database_with_corrected_metrics(
@@ -363,73 +515,45 @@ def update_database_with_corrected_metrics(
     Returns:
         Updated DataFrame with corrected metrics for financial institutions
     """
-    # Add institution type column
-    df['institution_type'] = df['ticker'].apply(
-        lambda x: get_institution_type(int(x) if pd.notna(x) else 0).value
-    )
-
-    # Add primary income metric name
-    df['primary_income_metric'] = df['institution_type'].map({
-        'bank': 'Net Interest Income',
-        'insurance': 'Gross Written Premiums',
-        'finance': 'Interest Income',
-        'standard': 'Revenue'
-    })
-
-    # For banks, calculate ROE and ROA from net_profit where revenue is null
-    bank_mask = df['institution_type'] == 'bank'
-
-    # Calculate ROE for banks (if not already calculated)
-    df.loc[bank_mask & df['return_on_equity'].isna(), 'calc_ROE'] = (
-        df.loc[bank_mask & df['return_on_equity'].isna()].apply(
-            lambda row: (row['net_profit'] / row['total_equity'] * 100)
-            if pd.notna(row['net_profit']) and pd.notna(row['total_equity']) and row['total_equity'] != 0
-            else None,
-            axis=1
-        )
-    )
-
-    # Calculate ROA for banks
-    df.loc[bank_mask & df['return_on_assets'].isna(), 'calc_ROA'] = (
-        df.loc[bank_mask & df['return_on_assets'].isna()].apply(
-            lambda row: (row['net_profit'] / row['total_assets'] * 100)
-            if pd.notna(row['net_profit']) and pd.notna(row['total_assets']) and row['total_assets'] != 0
-            else None,
-            axis=1
-        )
-    )
-
-    # Same for insurance companies
-    insurance_mask = df['institution_type'] == 'insurance'
-
-    df.loc[insurance_mask & df['return_on_equity'].isna(), 'calc_ROE'] = (
-        df.loc[insurance_mask & df['return_on_equity'].isna()].apply(
-            lambda row: (row['net_profit'] / row['total_equity'] * 100)
-            if pd.notna(row['net_profit']) and pd.notna(row['total_equity']) and row['total_equity'] != 0
-            else None,
-            axis=1
-        )
-    )
-
-    df.loc[insurance_mask & df['return_on_assets'].isna(), 'calc_ROA'] = (
-        df.loc[insurance_mask & df['return_on_assets'].isna()].apply(
-            lambda row: (row['net_profit'] / row['total_assets'] * 100)
-            if pd.notna(row['net_profit']) and pd.notna(row['total_assets']) and row['total_assets'] != 0
-            else None,
-            axis=1
-        )
-    )
-
-    # Add flag for companies requiring special metric sourcing
-    df['requires_special_metrics'] = df['institution_type'].isin(['bank', 'insurance', 'finance'])
-
-    # Add notes for revenue interpretation
-    df['revenue_note'] = df['institution_type'].map({
-        'bank': 'Banks: Use Net Interest Income instead of Revenue',
-        'insurance': 'Insurance: Use Gross Written Premiums instead of Revenue',
-        'finance': 'Finance Co: Use Interest/Fee Income instead of Revenue',
-        'standard': None
-    })
+    # Add institution type column, built straight from category codes
+    # (InstitutionType order); missing tickers count as standard
+    tickers = pd.to_numeric(df['ticker'], errors='coerce').to_numpy(dtype=np.int32, na_value=0)
+    type_codes = np.select(
+        [np.isin(tickers, _BANK_ARR), np.isin(tickers, _INS_ARR), np.isin(tickers, _FIN_ARR)],
+        [0, 1, 2],
+        default=3
+    ).astype(np.int8)
+    df['institution_type'] = pd.Categorical.from_codes(type_codes, dtype=INSTITUTION_TYPE_DTYPE)
+
+    # Add primary income metric name, gathered by category code
+    income_metrics = np.array([
+        'Net Interest Income',
+        'Gross Written Premiums',
+        'Interest Income',
+        'Revenue'
+    ], dtype=object)
+    df['primary_income_metric'] = income_metrics[type_codes]
+
+    # For banks and insurance companies (the first two codes) without a
+    # reported ROE/ROA, calculate it from net_profit; only those rows are computed
+    financial_rows = type_codes <= INSTITUTION_TYPE_DTYPE.categories.get_loc('insurance')
+    roe_rows = financial_rows & df['return_on_equity'].isna().to_numpy()
+    roa_rows = financial_rows & df['return_on_assets'].isna().to_numpy()
+    net_profit = df['net_profit']
+    df.loc[roe_rows, 'calc_ROE'] = _ratio(net_profit[roe_rows], df['total_equity'][roe_rows])
+    df.loc[roa_rows, 'calc_ROA'] = _ratio(net_profit[roa_rows], df['total_assets'][roa_rows])
+
+    # Add flag for companies requiring special metric sourcing (standard is the last code)
+    df['requires_special_metrics'] = type_codes < INSTITUTION_TYPE_DTYPE.categories.get_loc('standard')
+
+    # Add notes for revenue interpretation, gathered by category code
+    revenue_notes = np.array([
+        'Banks: Use Net Interest Income instead of Revenue',
+        'Insurance: Use Gross Written Premiums instead of Revenue',
+        'Finance Co: Use Interest/Fee Income instead of Revenue',
+        None
+    ], dtype=object)
+    df['revenue_note'] = revenue_notes[type_codes]
 
     if output_path:
         df.to_csv(output_path, index=False)
@@ -447,25 +571,32 @@ def generate_financial_institution_report(df: pd.DataFrame) -> str:
     report.append("TASI Financial Institutions Summary Report")
     report.append("=" * 70)
 
+    # First and last fiscal year per ticker, one groupby per institution type
+    year_ranges = {
+        itype: (
+            df.loc[df['institution_type'] == itype, ['ticker', 'fiscal_year']]
+            .groupby('ticker')['fiscal_year'].agg(['min', 'max'])
+            .dropna()
+            .to_dict('index')
+        )
+        for itype in ('bank', 'insurance')
+    }
+
+    def year_range(itype: str, ticker: int) -> str:
+        years = year_ranges[itype].get(ticker)
+        return f"{int(years['min'])}-{int(years['max'])}" if years else "No data"
+
     # Banks summary
-    banks = df[df['institution_type'] == 'bank']
     report.append(f"\nBANKS ({len(BANK_TICKERS)} total)")
     report.append("-" * 40)
-    for ticker, name in sorted(BANK_TICKERS.items()):
-        bank_data = banks[banks['ticker'] == ticker]
-        years = sorted(bank_data['fiscal_year'].dropna().unique())
-        year_range = f"{int(min(years))}-{int(max(years))}" if years else "No data"
-        report.append(f"  {ticker}: {name} [{year_range}]")
+    for ticker, name in _BANK_TICKERS_SORTED:
+        report.append(f"  {ticker}: {name} [{year_range('bank', ticker)}]")
 
     # Insurance summary
-    insurance = df[df['institution_type'] == 'insurance']
     report.append(f"\nINSURANCE COMPANIES ({len(INSURANCE_TICKERS)} total)")
     report.append("-" * 40)
-    for ticker, name in sorted(INSURANCE_TICKERS.items()):
-        ins_data = insurance[insurance['ticker'] == ticker]
-        years = sorted(ins_data['fiscal_year'].dropna().unique())
-        year_range = f"{int(min(years))}-{int(max(years))}" if years else "No data"
-        report.append(f"  {ticker}: {name} [{year_range}]")
+    for ticker, name in _INSURANCE_TICKERS_SORTED:
+        report.append(f"  {ticker}: {name} [{year_range('insurance', ticker)}]")
 
     # Metrics guidance
     report.append("\n" + "=" * 70)
@@ -490,6 +621,45 @@ def generate_financial_institution_report(df: pd.DataFrame) -> str:
     return "\n".join(report)
 
 
+# Narrow dtypes for the key columns every mask and lookup scans. Amounts stay
+# float64: float32 keeps only ~7 significant digits, too few for SAR totals.
+LOAD_DTYPES = {'ticker': 'Int32', 'fiscal_year': 'Int16', 'period_type': 'category'}
+
+
+def load_financials(path: str) -> pd.DataFrame:
+    """Read the TASI financials CSV (multithreaded pyarrow parser) with compact key column dtypes."""
+    return pd.read_csv(path, engine='pyarrow').astype(LOAD_DTYPES)
+
+
+# Rows per chunk when updating a CSV in chunks; bounds peak memory
+CSV_CHUNK_ROWS = 50_000
+
+
+def update_csv_in_chunks(
+    db_path: str,
+    output_path: str,
+    chunk_rows: int = CSV_CHUNK_ROWS
+) -> pd.DataFrame:
+    """
+    Run update_database_with_corrected_metrics over the CSV chunk by chunk
+
+    Every step of the update is row-local, so each chunk is processed and
+    appended to output_path on its own and the whole file is never in memory.
+    The pyarrow engine cannot stream chunks, so this uses the default parser.
+
+    Returns:
+        ticker, fiscal_year and institution_type for every row, which is all
+        the report and the summary counts need
+    """
+    key_columns = []
+    chunks = pd.read_csv(db_path, chunksize=chunk_rows)
+    for number, chunk in enumerate(chunks):
+        updated = update_database_with_corrected_metrics(chunk.astype(LOAD_DTYPES))
+        updated.to_csv(output_path, mode='a' if number else 'w', header=not number, index=False)
+        key_columns.append(updated[['ticker', 'fiscal_year', 'institution_type']])
+    return pd.concat(key_columns, ignore_index=True)
+
+
 # Main execution
 if __name__ == "__main__":
     # Path to the TASI database
@@ -499,12 +669,10 @@ if __name__ == "__main__":
     print("Loading TASI Financial Database...")
 
     if os.path.exists(DB_PATH):
-        df = pd.read_csv(DB_PATH)
-        print(f"Loaded {len(df)} records")
-
-        # Update with corrected metrics
+        # Update with corrected metrics, streaming the CSV in chunks
         print("\nProcessing financial institution metrics...")
-        df_updated = update_database_with_corrected_metrics(df, OUTPUT_PATH)
+        df_updated = update_csv_in_chunks(DB_PATH, OUTPUT_PATH)
+        print(f"Processed {len(df_updated)} records")
 
         # Generate report
         print("\n" + generate_financial_institution_report(df_updated))
@@ -0,0 +1,152 @@
+"""
+Semantic cache in front of Vanna SQL generation
+================================================
+Embeds each trained example question once and stores (question, sql,
+embedding) in SQLite. At ask time a question whose embedding is close
+enough to a cached one gets the cached SQL back without an LLM call;
+anything else falls through to Vanna and is added to the cache.
+
+Questions only match when their numeric tokens (years, tickers, limits)
+are identical, so "... in 2023" never reuses the SQL cached for "... in 2024".
+
+Run this script to seed the cache from the training examples in
+schema/03_vanna_training.py. Needs the optional dependencies in
+requirements-cache.txt.
+"""
+
+import importlib.util
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+
+CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", str(ROOT / "data" / "semantic_cache.sqlite"))
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.95  # Cosine similarity needed to reuse cached SQL
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _numeric_tokens(text: str) -> Tuple[str, ...]:
+    """Numbers in a question (years, tickers, limits), in order."""
+    return tuple(_NUMBER_PATTERN.findall(text))
+
+
+class SemanticCache:
+    """Question -> SQL cache matched by embedding similarity"""
+
+    def __init__(self, path: str = CACHE_PATH, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._model = None
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                question TEXT PRIMARY KEY,
+                sql TEXT NOT NULL,
+                embedding BLOB NOT NULL
+            )
+        """)
+        self._load()
+
+    def _load(self) -> None:
+        """Read all cached rows into memory."""
+        rows = self.conn.execute("SELECT question, sql, embedding FROM semantic_cache").fetchall()
+        self.sqls: List[str] = [sql for _, sql, _ in rows]
+        self.numbers: List[Tuple[str, ...]] = [_numeric_tokens(question) for question, _, _ in rows]
+        # Normalized embeddings, one row per cached question; a dot product is the cosine
+        self.matrix = np.array([np.frombuffer(blob, dtype=np.float32) for _, _, blob in rows])
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as L2-normalized float32 vectors (model loaded on first use)."""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(EMBEDDING_MODEL)
+        return self._model.encode(texts, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, question: str) -> Tuple[Optional[str], float]:
+        """Find the cached SQL for the most similar question with the same numbers.
+
+        Returns:
+            (sql, score); sql is None when no cached question has the same
+            numeric tokens or the best score is below the threshold
+        """
+        numbers = _numeric_tokens(question)
+        candidates = np.array([cached == numbers for cached in self.numbers], dtype=bool)
+        if not candidates.any():
+            return None, 0.0
+        scores = np.where(candidates, self.matrix @ self._embed([question])[0], -np.inf)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self.sqls[best] if score >= self.threshold else None), score
+
+    def add_many(self, pairs: List[Tuple[str, str]]) -> None:
+        """Embed and store (question, sql) pairs, replacing existing questions."""
+        if not pairs:
+            return
+        vectors = self._embed([question for question, _ in pairs])
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO semantic_cache (question, sql, embedding) VALUES (?, ?, ?)",
+            [(question, sql, vector.tobytes()) for (question, sql), vector in zip(pairs, vectors)],
+        )
+        self.conn.commit()
+        # Reload so replaced questions do not leave stale rows behind
+        self._load()
+
+    def add(self, question: str, sql: str) -> None:
+        """Store one question-SQL pair."""
+        self.add_many([(question, sql)])
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        self.conn.close()
+
+
+def semantic_ask(vn, question: str, cache: SemanticCache) -> str:
+    """Return SQL for a question, from the cache when a close match exists.
+
+    Args:
+        vn: Vanna instance used on a cache miss
+        question: Natural language question
+        cache: SemanticCache to read from and extend
+
+    Returns:
+        Generated or cached SQL
+    """
+    sql, _ = cache.lookup(question)
+    if sql is None:
+        sql = vn.generate_sql(question)
+        cache.add(question, sql)
+    return sql
+
+
+def load_example_queries() -> List[Tuple[str, str]]:
+    """Load the (question, sql) pairs trained by schema/03_vanna_training.py."""
+    # The module name starts with a digit, so it is loaded from its path
+    spec = importlib.util.spec_from_file_location(
+        "vanna_training", ROOT / "schema" / "03_vanna_training.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [(item["question"], item["sql"].strip()) for item in module.example_queries()]
+
+
+def main():
+    pairs = load_example_queries()
+    print(f"Embedding {len(pairs)} example questions with {EMBEDDING_MODEL}...")
+
+    Path(CACHE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    cache = SemanticCache()
+    cache.add_many(pairs)
+    print(f"Semantic cache at {CACHE_PATH} holds {len(cache.sqls)} questions")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
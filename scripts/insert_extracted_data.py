@@ -29,6 +29,17 @@ def log(message):
     print(log_message)
     log_messages.append(log_message)
 
+def safe_divide(numerator, denominator):
+    """numerator / denominator as a float array; NaN where the numerator is missing or the denominator is zero"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    # Masked lanes are never divided, so zero denominators raise no warnings
+    return np.divide(
+        numerator, denominator,
+        out=np.full(len(numerator), np.nan),
+        where=(denominator != 0) & ~np.isnan(numerator)
+    )
+
 def calculate_derived_fields(df):
     """Calculate derived financial metrics for records"""
     log("Calculating derived financial metrics...")
@@ -36,75 +47,31 @@ def calculate_derived_fields(df):
     # Make a copy to avoid SettingWithCopyWarning
     df = df.copy()
 
-    # Financial ratios
-    df['calc_ROE'] = np.where(
-        (df['total_equity'] != 0) & (df['net_profit'].notna()),
-        (df['net_profit'] / df['total_equity']) * 100,
-        np.nan
-    )
-
-    df['calc_ROA'] = np.where(
-        (df['total_assets'] != 0) & (df['net_profit'].notna()),
-        (df['net_profit'] / df['total_assets']) * 100,
-        np.nan
-    )
-
-    df['calc_gross_margin'] = np.where(
-        (df['revenue'] != 0) & (df['gross_profit'].notna()),
-        (df['gross_profit'] / df['revenue']) * 100,
-        np.nan
-    )
-
-    df['calc_operating_margin'] = np.where(
-        (df['revenue'] != 0) & (df['operating_profit'].notna()),
-        (df['operating_profit'] / df['revenue']) * 100,
-        np.nan
-    )
-
-    df['calc_net_margin'] = np.where(
-        (df['revenue'] != 0) & (df['net_profit'].notna()),
-        (df['net_profit'] / df['revenue']) * 100,
-        np.nan
-    )
-
-    df['calc_current_ratio'] = np.where(
-        (df['current_liabilities'] != 0) & (df['current_assets'].notna()),
-        df['current_assets'] / df['current_liabilities'],
-        np.nan
-    )
-
-    df['calc_quick_ratio'] = np.where(
-        (df['current_liabilities'] != 0) & (df['current_assets'].notna()) & (df['inventory'].notna()),
-        (df['current_assets'] - df['inventory']) / df['current_liabilities'],
-        np.nan
-    )
-
-    df['calc_debt_to_equity'] = np.where(
-        (df['total_equity'] != 0) & (df['total_liabilities'].notna()),
-        (df['total_liabilities'] / df['total_equity']) * 100,
-        np.nan
-    )
-
-    df['calc_debt_to_assets'] = np.where(
-        (df['total_assets'] != 0) & (df['total_liabilities'].notna()),
-        (df['total_liabilities'] / df['total_assets']) * 100,
-        np.nan
-    )
-
-    df['calc_asset_turnover'] = np.where(
-        (df['total_assets'] != 0) & (df['revenue'].notna()),
-        df['revenue'] / df['total_assets'],
-        np.nan
-    )
-
-    df['calc_working_capital'] = np.where(
-        (df['current_assets'].notna()) & (df['current_liabilities'].notna()),
-        df['current_assets'] - df['current_liabilities'],
-        np.nan
-    )
+    # Financial ratios; each ratio is divided once and reused for its
+    # percentage and decimal columns
+    roe = safe_divide(df['net_profit'], df['total_equity'])
+    roa = safe_divide(df['net_profit'], df['total_assets'])
+    gross_margin = safe_divide(df['gross_profit'], df['revenue'])
+    operating_margin = safe_divide(df['operating_profit'], df['revenue'])
+    net_margin = safe_divide(df['net_profit'], df['revenue'])
+
+    df['calc_ROE'] = roe * 100
+    df['calc_ROA'] = roa * 100
+    df['calc_gross_margin'] = gross_margin * 100
+    df['calc_operating_margin'] = operating_margin * 100
+    df['calc_net_margin'] = net_margin * 100
+    df['calc_current_ratio'] = safe_divide(df['current_assets'], df['current_liabilities'])
+    # NaN current assets or inventory makes the numerator NaN
+    df['calc_quick_ratio'] = safe_divide(df['current_assets'] - df['inventory'], df['current_liabilities'])
+    df['calc_debt_to_equity'] = safe_divide(df['total_liabilities'], df['total_equity']) * 100
+    df['calc_debt_to_assets'] = safe_divide(df['total_liabilities'], df['total_assets']) * 100
+    df['calc_asset_turnover'] = safe_divide(df['revenue'], df['total_assets'])
+    df['calc_working_capital'] = df['current_assets'] - df['current_liabilities']
 
     # Metadata fields
-    df['period_label'] = df['period_type'].apply(lambda x: f"FY{df.loc[df['period_type'] == x, 'fiscal_year'].iloc[0]}" if x == 'Annual' else 'Q')
+    is_annual = (df['period_type'] == 'Annual').to_numpy()
+    fiscal_year = df['fiscal_year'].astype(str)
+    df['period_label'] = np.where(is_annual, 'FY' + fiscal_year, 'Q')
     df['revenue_millions'] = df['revenue'] / 1_000_000
     df['net_profit_millions'] = df['net_profit'] / 1_000_000
     df['total_assets_millions'] = df['total_assets'] / 1_000_000
@@ -118,14 +85,14 @@ def calculate_derived_fields(df):
     df['debt_to_equity_pct'] = df['calc_debt_to_equity']
     df['debt_to_assets_pct'] = df['calc_debt_to_assets']
 
-    df['is_annual'] = df['period_type'] == 'Annual'
+    df['is_annual'] = is_annual
     df['is_latest'] = False  # Will be updated later
 
     df['period_date'] = pd.to_datetime(df['period_end'], errors='coerce')
-    df['year_quarter'] = df.apply(
-        lambda row: f"{row['fiscal_year']}-FY" if row['period_type'] == 'Annual' else f"{row['fiscal_year']}-Q{pd.to_datetime(row['period_end']).quarter}",
-        axis=1
-    )
+    # period_end parsed per value like the old row-wise code; a missing date gives "Qnan" as before
+    quarter = pd.to_datetime(df['period_end'], errors='coerce', format='mixed').dt.quarter
+    quarter = np.where(quarter.isna(), 'nan', quarter.fillna(0).astype(int).astype(str))
+    df['year_quarter'] = np.where(is_annual, fiscal_year + '-FY', fiscal_year + '-Q' + quarter)
 
     # Status fields
     df['profit_status'] = np.where(df['net_profit'] > 0, 'Profit',
@@ -137,14 +104,63 @@ def calculate_derived_fields(df):
     df['ticker_name'] = df['ticker'].astype(str) + ' - ' + df['company_name']
 
     # Decimal versions of percentages
-    df['roe_decimal'] = df['calc_ROE'] / 100
-    df['roa_decimal'] = df['calc_ROA'] / 100
-    df['gross_margin_decimal'] = df['calc_gross_margin'] / 100
-    df['operating_margin_decimal'] = df['calc_operating_margin'] / 100
-    df['net_margin_decimal'] = df['calc_net_margin'] / 100
+    df['roe_decimal'] = roe
+    df['roa_decimal'] = roa
+    df['gross_margin_decimal'] = gross_margin
+    df['operating_margin_decimal'] = operating_margin
+    df['net_margin_decimal'] = net_margin
 
     return df
 
+# Columns identifying one financial record
+KEY_COLUMNS = ['ticker', 'fiscal_year', 'period_type']
+
+# extraction_date assumed for existing records when the database has none
+DEFAULT_EXTRACTION_DATE = pd.Timestamp('2000-01-01')
+
+def match_existing_records(new_data, existing_db):
+    """Classify each new record as NEW, UPDATE or SKIP against the existing database
+
+    Same outcome as checking the records one at a time in input order: a record
+    matches the first existing row with its key (missing keys never match) and
+    updates it only if its extraction_date is newer than that row's and than
+    any earlier record in this batch that already updated it.
+
+    Returns:
+        (status, existing_index) Series aligned with new_data; existing_index
+        is the matched existing row label, NaN for NEW records
+    """
+    keys = existing_db[KEY_COLUMNS].dropna()
+    lookup = keys[~keys.duplicated(keep='first')]
+    lookup = lookup.assign(existing_index=lookup.index)
+    has_dates = 'extraction_date' in existing_db
+    if has_dates:
+        lookup['existing_date'] = pd.to_datetime(
+            existing_db.loc[lookup.index, 'extraction_date'], errors='coerce', format='mixed'
+        )
+
+    merged = new_data[KEY_COLUMNS].merge(lookup, on=KEY_COLUMNS, how='left', indicator=True)
+    merged.index = new_data.index
+    matched = merged['_merge'] == 'both'
+
+    new_date = pd.to_datetime(new_data['extraction_date'], errors='coerce', format='mixed')
+    if has_dates:
+        # An update rewrites the row's extraction_date, so later records with
+        # the same key must also beat every earlier date in the batch
+        groups = [merged[col] for col in KEY_COLUMNS]
+        running = new_date.fillna(pd.Timestamp.min).groupby(groups, sort=False).cummax()
+        prior = running.groupby(groups, sort=False).shift(fill_value=pd.Timestamp.min)
+        existing_date = merged['existing_date']
+        newer = (new_date > existing_date) & (new_date > prior)
+    else:
+        newer = new_date > DEFAULT_EXTRACTION_DATE
+
+    status = pd.Series(
+        np.select([~matched, newer], ['NEW', 'UPDATE'], default='SKIP'),
+        index=new_data.index
+    )
+    return status, merged['existing_index']
+
 def main():
     log("="*80)
     log("TASI Financial Database Insertion Script")
@@ -184,38 +200,29 @@ def main():
     log("Analyzing Records for Insertion/Update")
     log("="*80)
 
-    new_records = []
-    updated_records = []
-    duplicate_records = []
-
-    for idx, new_row in new_data_enhanced.iterrows():
-        ticker = new_row['ticker']
-        fiscal_year = new_row['fiscal_year']
-        period_type = new_row['period_type']
-
-        # Check if record exists
-        existing_match = existing_db[
-            (existing_db['ticker'] == ticker) &
-            (existing_db['fiscal_year'] == fiscal_year) &
-            (existing_db['period_type'] == period_type)
-        ]
-
-        if len(existing_match) == 0:
-            new_records.append(new_row)
-            log(f"NEW: Ticker {ticker}, FY {fiscal_year}, {period_type}")
-        else:
-            # Check if we should update (newer extraction date)
-            existing_date = pd.to_datetime(existing_match.iloc[0].get('extraction_date', '2000-01-01'), errors='coerce')
-            new_date = pd.to_datetime(new_row['extraction_date'], errors='coerce')
-
-            if pd.notna(new_date) and pd.notna(existing_date) and new_date > existing_date:
-                # Update existing record
-                existing_db.loc[existing_match.index[0]] = new_row
-                updated_records.append(new_row)
-                log(f"UPDATE: Ticker {ticker}, FY {fiscal_year}, {period_type} (newer data)")
-            else:
-                duplicate_records.append(new_row)
-                log(f"SKIP: Ticker {ticker}, FY {fiscal_year}, {period_type} (duplicate, not newer)")
+    status, existing_index = match_existing_records(new_data_enhanced, existing_db)
+    is_new = (status == 'NEW').to_numpy()
+    is_update = (status == 'UPDATE').to_numpy()
+
+    messages = {
+        'NEW': "NEW: Ticker {}, FY {}, {}",
+        'UPDATE': "UPDATE: Ticker {}, FY {}, {} (newer data)",
+        'SKIP': "SKIP: Ticker {}, FY {}, {} (duplicate, not newer)",
+    }
+    for row_status, *key in zip(status, *(new_data_enhanced[col].to_numpy() for col in KEY_COLUMNS)):
+        log(messages[row_status].format(*key))
+
+    new_records = new_data_enhanced[is_new]
+    updated_records = new_data_enhanced[is_update]
+    duplicate_records = new_data_enhanced[~(is_new | is_update)]
+
+    # Update existing records in one assignment; when a key is updated more
+    # than once in this batch, the last (newest) record wins
+    if len(updated_records):
+        targets = existing_index[is_update].astype(existing_db.index.dtype)
+        last = ~targets.duplicated(keep='last').to_numpy()
+        replacements = updated_records[last].reindex(columns=existing_db.columns)
+        existing_db.loc[targets[last]] = replacements.set_axis(targets[last].to_numpy())
 
     log("\n" + "="*80)
     log("Insertion Summary")
@@ -226,17 +233,11 @@ def main():
     log(f"Duplicate records skipped: {len(duplicate_records)}")
 
     # Append new records to existing database
-    if new_records:
+    if len(new_records):
         log("\nAppending new records to database...")
-        new_records_df = pd.DataFrame(new_records)
-
-        # Align columns with existing database
-        for col in existing_db.columns:
-            if col not in new_records_df.columns:
-                new_records_df[col] = np.nan
 
-        # Reorder columns to match existing database
-        new_records_df = new_records_df[existing_db.columns]
+        # Align columns with existing database (missing ones as NaN, same order)
+        new_records_df = new_records.reindex(columns=existing_db.columns)
 
         # Append to existing database
         updated_db = pd.concat([existing_db, new_records_df], ignore_index=True)
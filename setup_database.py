@@ -16,6 +16,8 @@ from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 
+from etl_helpers import parse_date, clean_numeric, clean_boolean, refresh_company_financials, vacuum_analyze
+
 # Load environment variables
 load_dotenv()
 
@@ -144,37 +146,6 @@ def run_migration(conn):
     companies_cache = {}
     periods_cache = {}
 
-    def clean_numeric(value):
-        if pd.isna(value) or value == "" or value is None:
-            return None
-        if isinstance(value, str):
-            value = value.replace("%", "").replace(",", "").strip()
-            if not value:
-                return None
-        try:
-            return float(value)
-        except:
-            return None
-
-    def clean_boolean(value):
-        if pd.isna(value):
-            return False
-        if isinstance(value, bool):
-            return value
-        if isinstance(value, str):
-            return value.upper() in ("TRUE", "YES", "1", "T")
-        return bool(value)
-
-    def parse_date(date_str):
-        if pd.isna(date_str) or not date_str:
-            return None
-        for fmt in ["%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y"]:
-            try:
-                return datetime.strptime(str(date_str), fmt)
-            except:
-                continue
-        return None
-
     def get_quarter(period_end, period_type):
         if period_type == "Annual":
             return "FY"
@@ -391,14 +362,13 @@ def run_migration(conn):
 def refresh_view(conn):
     """Refresh the materialized view."""
     print("\n🔄 Refreshing materialized view...")
-    cursor = conn.cursor()
     try:
-        cursor.execute("REFRESH MATERIALIZED VIEW company_financials")
-        conn.commit()
+        vacuum_analyze(conn)
+        refresh_company_financials(conn)
         print("   ✓ View refreshed")
     except Exception as e:
+        conn.rollback()
         print(f"   ⚠ Could not refresh view: {e}")
-    cursor.close()
 
 
 def validate_setup(conn):
@@ -175,7 +175,7 @@ class TASIFinancialAgent:
 ### General Company Queries
 
 Question: "Show all companies"
-SQL: SELECT ticker, company_name, sector, company_type, size_category FROM company_financials WHERE is_latest = TRUE GROUP BY ticker, company_name, sector, company_type, size_category ORDER BY company_name;
+SQL: SELECT DISTINCT ON (ticker) ticker, company_name, sector, company_type, size_category FROM company_financials WHERE is_latest = TRUE ORDER BY ticker, company_name;
 
 Question: "Which companies are most profitable?"
 SQL: SELECT ticker, company_name, sector, roe_percent, net_profit_millions, revenue_millions FROM company_financials WHERE is_latest = TRUE AND is_annual = TRUE AND profit_status = 'Profit' ORDER BY roe_percent DESC NULLS LAST LIMIT 20;